@@ -2,15 +2,33 @@ import os
 import sys
 import importlib
 import traceback
+from datetime import timedelta
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_mail import Mail
 from flask_session import Session
-from sqlalchemy import text
 
-db = SQLAlchemy()
+# Sibling modules import each other by flat name (`from models import db`),
+# so the backend directory must be importable even when loaded as a package.
+_here = os.path.dirname(os.path.abspath(__file__))
+if _here not in sys.path:
+    sys.path.insert(0, _here)
+
+
+def _load_module(name):
+    """Import a sibling module once, under both its flat and `backend.` names."""
+    module = importlib.import_module(name)
+    sys.modules.setdefault(f"backend.{name}", module)
+    return module
+
+
+db_engine = _load_module("db_engine")
+
+CORS_ORIGINS = ["http://localhost:5173"]
+
+db = SQLAlchemy(session_options={'class_': db_engine.RoutingSession})
 migrate = Migrate()
 sess = Session()
 mail = Mail()
@@ -45,8 +63,27 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///parking.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'change-me')
-    app.config['SESSION_TYPE'] = os.environ.get('SESSION_TYPE', 'filesystem')
+    app.config['DATABASE_READ_URL'] = os.environ.get('DATABASE_READ_URL')  # defaults to the same SQLite file
+    app.config['SQLALCHEMY_POOL_SIZE'] = int(os.environ.get('SQLALCHEMY_POOL_SIZE', 5))
+    app.config['SQLALCHEMY_READ_POOL_SIZE'] = int(os.environ.get('SQLALCHEMY_READ_POOL_SIZE', 10))
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 15000))
+    app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    app.config['ASGI_WSGI_THREADS'] = int(os.environ.get('ASGI_WSGI_THREADS', 32))  # asgi.py: Flask requests
+    app.config['ASGI_STREAM_THREADS'] = int(os.environ.get('ASGI_STREAM_THREADS', 256))  # asgi.py: open SSE streams
+    app.config['SESSION_TYPE'] = os.environ.get('SESSION_TYPE', 'filesystem')  # filesystem | redis | cookie
     app.config['SESSION_PERMANENT'] = False
+    app.config['SESSION_REDIS_URL'] = os.environ.get('SESSION_REDIS_URL', 'redis://localhost:6379/2')
+    app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(seconds=int(os.environ.get('SESSION_LIFETIME', 12 * 3600)))
+    app.config['BILLING_ROUNDING_MINUTES'] = int(os.environ.get('BILLING_ROUNDING_MINUTES', 60))
+    app.config['EXPORTS_DIR'] = os.environ.get('EXPORTS_DIR', os.path.abspath(os.path.join(app.root_path, '..', 'exports')))
+    app.config['EXPORT_RETENTION_HOURS'] = float(os.environ.get('EXPORT_RETENTION_HOURS', 24))
+    app.config['DEFAULT_MAX_STAY_MINUTES'] = int(os.environ.get('DEFAULT_MAX_STAY_MINUTES', 0))  # 0 = no expiry
+    app.config['CACHE_TYPE'] = os.environ.get('CACHE_TYPE', 'redis')
+    app.config['CACHE_REDIS_URL'] = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/1')
+    app.config['EVENTS_TYPE'] = os.environ.get('EVENTS_TYPE', 'redis')
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))  # 0 = hash inline
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') in ('1', 'true', 'True')
 
     app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
     app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
@@ -54,19 +91,26 @@ def create_app():
     app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME', '')
     app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD', '')
     app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER', app.config['MAIL_USERNAME'] or 'no-reply@example.com')
+    app.config['MAIL_RATE_LIMIT'] = float(os.environ.get('MAIL_RATE_LIMIT', 10))  # messages/sec, 0 = unlimited
+    app.config['MAIL_MAX_RETRIES'] = int(os.environ.get('MAIL_MAX_RETRIES', 3))
+    app.config['MAIL_RETRY_BACKOFF'] = float(os.environ.get('MAIL_RETRY_BACKOFF', 1.0))
+    # Exports larger than this are sent as a download link instead of an attachment.
+    app.config['MAIL_MAX_ATTACHMENT_BYTES'] = int(os.environ.get('MAIL_MAX_ATTACHMENT_BYTES', 5 * 1024 * 1024))
+    app.config['PUBLIC_URL'] = os.environ.get('PUBLIC_URL', 'http://localhost:5000')
     if not app.config['MAIL_USERNAME'] or not app.config['MAIL_PASSWORD']:
         app.logger.warning("MAIL_USERNAME or MAIL_PASSWORD not set — disabling outbound email (MAIL_SUPPRESS_SEND=True).")
         app.config['MAIL_SUPPRESS_SEND'] = True
 
     
+    db_engine.configure_engines(app)
     db.init_app(app)
+    db_engine.install_sqlite_pragmas(app, db)
     migrate.init_app(app, db)
-    sess.init_app(app)
     mail.init_app(app)
 
     CORS(app,
          supports_credentials=True,
-         origins=["http://localhost:5173"],
+         origins=CORS_ORIGINS,
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
          allow_headers=["Content-Type", "Authorization", "X-Requested-With"])
 
@@ -76,35 +120,26 @@ def create_app():
         raise RuntimeError("routes module does not expose `api` blueprint")
     app.register_blueprint(routes_mod.api)
 
-    with app.app_context():
-        try:
-            models_mod = importlib.import_module("backend.models")
-        except Exception:
-            models_mod = importlib.import_module("models")
-        User = getattr(models_mod, "User")
-
-      
-        db.create_all()
-
-        
-        with db.engine.connect() as conn:
-            result = conn.execute(text("PRAGMA table_info(users);"))
-            columns = [row[1] for row in result]
-            if 'preferred_reminder_hour' not in columns:
-                conn.execute(text("ALTER TABLE users ADD COLUMN preferred_reminder_hour INTEGER DEFAULT 18;"))
-                conn.commit()
-
-       
-        if not User.query.filter_by(role='admin').first():
-            from werkzeug.security import generate_password_hash
-            admin = User(
-                username='admin',
-                email='admin@example.com',
-                role='admin',
-                password_hash=generate_password_hash('admin123', method='pbkdf2:sha256'),
-                preferred_reminder_hour=18
-            )
-            db.session.add(admin)
-            db.session.commit()
+    sessions_mod = _load_module("sessions")
+    sessions_mod.init_sessions(app, sess)
+    app.cli.add_command(sessions_mod.purge_sessions_command)
+
+    availability_mod = _load_module("availability")
+    app.cli.add_command(availability_mod.reconcile_counters_command)
+
+    bootstrap_mod = _load_module("bootstrap")
+    app.cli.add_command(bootstrap_mod.init_db_command)
+
+    cache_mod = _load_module("cache")
+    cache_mod.cache.init_app(app)
+
+    events_mod = _load_module("events")
+    events_mod.events.init_app(app)
+
+    metrics_mod = _load_module("metrics")
+    metrics_mod.metrics.init_app(app)
+
+    passwords_mod = _load_module("passwords")
+    passwords_mod.hasher.init_app(app)
 
     return app
\ No newline at end of file
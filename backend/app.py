@@ -3,5 +3,10 @@ from __init__ import create_app
 app = create_app()
 
 if __name__ == "__main__":
-    
+    # Local development: make sure the schema and admin exist before serving.
+    # Deployments run `flask db upgrade` to build or update the schema, then
+    # `flask init-db` to seed the default admin (migrations do not seed it).
+    from bootstrap import init_db
+    with app.app_context():
+        init_db()
     app.run(host="127.0.0.1", port=5000, debug=True)
\ No newline at end of file
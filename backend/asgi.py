@@ -0,0 +1,286 @@
+"""
+ASGI entry point. Serves the high-fanout read endpoints (lot listing, lot
+availability, admin spot grid) with async SQLAlchemy on aiosqlite, so one
+worker holds thousands of polling clients without a thread each.
+
+    uvicorn asgi:app --workers 4
+
+Every other request (writes, auth, exports, the /events SSE streams) runs the
+Flask app in a thread pool: ASGI_WSGI_THREADS threads for ordinary requests
+and a separate ASGI_STREAM_THREADS pool for SSE, so open streams can never
+starve the rest of the API. Each open stream holds one stream thread until the
+client disconnects. Deployments expecting more concurrent streams than that
+should raise ASGI_STREAM_THREADS or keep serving /events from the WSGI server.
+
+The native handlers build their statements with queries.py, like the Flask
+views, so responses, status codes and pagination headers match. Auth reads
+the same session cookie (or server-side session) the Flask app writes.
+"""
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgiInstance
+from flask.sessions import SecureCookieSessionInterface
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.http import parse_cookie
+
+from __init__ import CORS_ORIGINS, create_app
+from db_engine import READ_BIND
+from models import db, ParkingLot
+from queries import availability_of, count_rows, lot_listing, lot_spots as lot_spots_stmt, page_bounds, parse_bool, serialize_spot
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+STREAM_PATH = re.compile(r'/parkinglots(/\d+)?/events')
+
+flask_app = create_app()
+
+
+def _async_url(app):
+    """
+    The URL of the Flask app's read pool (or writer), after Flask-SQLAlchemy
+    has resolved relative SQLite paths against the instance folder, with the
+    async driver swapped in. ASYNC_DATABASE_URL overrides it.
+    """
+    if app.config.get('ASYNC_DATABASE_URL'):
+        url = make_url(app.config['ASYNC_DATABASE_URL'])
+    else:
+        with app.app_context():
+            url = (db.engines.get(READ_BIND) or db.engine).url
+    backend = url.get_backend_name()
+    if url.drivername == backend and backend in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+    return url
+
+
+def _create_engine(app):
+    config = app.config
+    url = _async_url(app)
+    options = {}
+    if url.get_backend_name() != 'sqlite' or url.database not in (None, '', ':memory:'):
+        options['pool_size'] = config.get('SQLALCHEMY_READ_POOL_SIZE', 10)
+    engine = create_async_engine(url, **options)
+    if url.get_backend_name() == 'sqlite':
+        busy_timeout = int(config.get('SQLITE_BUSY_TIMEOUT_MS', 15000))
+        mmap_size = int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+
+        @event.listens_for(engine.sync_engine, 'connect')
+        def set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"PRAGMA busy_timeout={busy_timeout}")
+            cursor.execute(f"PRAGMA mmap_size={mmap_size}")
+            cursor.execute("PRAGMA query_only=ON")
+            cursor.close()
+    return engine
+
+
+engine = _create_engine(flask_app)
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+
+class _CookieRequest:
+    """Just enough of a request for SessionInterface.open_session."""
+
+    def __init__(self, cookie_header):
+        self.cookies = parse_cookie(cookie_header)
+
+
+async def load_session(headers):
+    request = _CookieRequest(headers.get('cookie', ''))
+    interface = flask_app.session_interface
+    if isinstance(interface, SecureCookieSessionInterface):
+        return interface.open_session(flask_app, request)
+    # Server-side stores (Redis, files) do blocking I/O.
+    return await asyncio.to_thread(interface.open_session, flask_app, request)
+
+
+def page_args(query, default_per_page=50, max_per_page=500):
+    """Async counterpart of routes.parse_page_args."""
+    def to_int(name):
+        try:
+            return int(query[name])
+        except (KeyError, ValueError):
+            return None
+    return page_bounds(to_int('page'), to_int('per_page'),
+                       default_per_page=default_per_page, max_per_page=max_per_page)
+
+
+async def _paginate(db, stmt, query, headers, **limits):
+    page, per_page = page_args(query, **limits)
+    if page is not None:
+        headers['X-Total-Count'] = str(await db.scalar(count_rows(stmt)))
+        stmt = stmt.offset((page - 1) * per_page).limit(per_page)
+    return stmt
+
+
+async def list_parkinglots(query):
+    stmt = lot_listing(pin_code=query.get('pin_code'), is_active=parse_bool(query.get('is_active')))
+    headers = {}
+    async with Session() as db:
+        stmt = await _paginate(db, stmt, query, headers)
+        lots = (await db.scalars(stmt)).all()
+    return 200, [lot.serialize() for lot in lots], headers
+
+
+async def lot_availability(query, lot_id):
+    async with Session() as db:
+        lot = await db.get(ParkingLot, lot_id)
+    if not lot:
+        return 404, {'message': 'Parking lot not found'}, {}
+    return 200, availability_of(lot), {}
+
+
+async def lot_spots(query, lot_id):
+    stmt = lot_spots_stmt(lot_id, status=query.get('status'))
+    headers = {}
+    async with Session() as db:
+        stmt = await _paginate(db, stmt, query, headers, default_per_page=100, max_per_page=1000)
+        rows = (await db.execute(stmt)).all()
+    return 200, [serialize_spot(*row) for row in rows], headers
+
+
+# (pattern, handler, required role: 'user' = any logged-in user)
+ROUTES = [
+    (re.compile(r'/parkinglots'), list_parkinglots, 'user'),
+    (re.compile(r'/parkinglots/(\d+)/availability'), lot_availability, 'user'),
+    (re.compile(r'/admin/parkinglots/(\d+)/spots'), lot_spots, 'admin'),
+]
+
+
+def _match(path):
+    for pattern, handler, role in ROUTES:
+        m = pattern.fullmatch(path)
+        if m:
+            return handler, role, [int(arg) for arg in m.groups()]
+    return None
+
+
+async def _send_json(send, status, body, headers, request_headers):
+    payload = json.dumps(body).encode()
+    raw_headers = [(b'content-type', b'application/json'), (b'content-length', str(len(payload)).encode())]
+    raw_headers += [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+    origin = request_headers.get('origin')
+    if origin in CORS_ORIGINS:
+        raw_headers += [
+            (b'access-control-allow-origin', origin.encode()),
+            (b'access-control-allow-credentials', b'true'),
+            (b'vary', b'Origin'),
+        ]
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+class _PooledWsgiInstance(WsgiToAsgiInstance):
+    """
+    asgiref's per-request WSGI adapter, run on `executor` instead of the one
+    shared thread its thread_sensitive default uses.
+    """
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        # The undecorated method; attribute access would go through the wrapper.
+        wsgi_call = WsgiToAsgiInstance.__dict__['run_wsgi_app'].func
+        run = sync_to_async(wsgi_call, thread_sensitive=False, executor=self.executor)
+        await run(self, body)
+
+
+class WsgiFallback:
+    """
+    Runs the Flask app for every request ReadPathApp does not serve natively.
+
+    Once the request body has been read, a watcher waits for http.disconnect;
+    after it, sends raise instead of being silently dropped, so an abandoned
+    SSE stream ends (at its next keep-alive) and frees its thread.
+    """
+
+    def __init__(self, wsgi_application, threads, stream_threads):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+        self.stream_executor = ThreadPoolExecutor(max_workers=stream_threads, thread_name_prefix='wsgi-stream')
+
+    async def __call__(self, scope, receive, send):
+        disconnected = asyncio.Event()
+        watcher = None
+
+        async def watch():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        async def receive_body():
+            nonlocal watcher
+            message = await receive()
+            if message['type'] != 'http.request' or not message.get('more_body'):
+                watcher = asyncio.ensure_future(watch())
+            return message
+
+        async def guarded_send(message):
+            if disconnected.is_set():
+                raise OSError('client disconnected')
+            await send(message)
+
+        executor = self.stream_executor if STREAM_PATH.fullmatch(scope['path']) else self.executor
+        try:
+            await _PooledWsgiInstance(self.wsgi_application, executor)(scope, receive_body, guarded_send)
+        except OSError:
+            if not disconnected.is_set():
+                raise
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+        self.stream_executor.shutdown(wait=False)
+
+
+class ReadPathApp:
+    """Serve ROUTES natively for GET; delegate everything else to `fallback`."""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        match = _match(scope['path']) if scope['type'] == 'http' and scope['method'] == 'GET' else None
+        if match is None:
+            return await self.fallback(scope, receive, send)
+
+        handler, role, args = match
+        headers = {k.decode('latin-1'): v.decode('latin-1') for k, v in scope['headers']}
+        session = await load_session(headers)
+        if 'user_id' not in session:
+            return await _send_json(send, 401, {'message': 'Authentication required'}, {}, headers)
+        if role == 'admin' and session.get('user_role') != 'admin':
+            return await _send_json(send, 403, {'message': 'Admin access required'}, {}, headers)
+
+        query = {k: v[-1] for k, v in parse_qs(scope.get('query_string', b'').decode()).items()}
+        status, body, extra_headers = await handler(query, *args)
+        await _send_json(send, status, body, extra_headers, headers)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await engine.dispose()
+                self.fallback.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+app = ReadPathApp(WsgiFallback(
+    flask_app,
+    threads=flask_app.config['ASGI_WSGI_THREADS'],
+    stream_threads=flask_app.config['ASGI_STREAM_THREADS'],
+))
@@ -0,0 +1,221 @@
+import random
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import case, func, insert, select, update
+
+from cache import cache
+from events import events
+from models import db, ParkingLot, ParkingSpot
+
+
+def adjust_lot_counts(lot_id, available=0, occupied=0):
+    """
+    Shift a lot's denormalized counters by the given deltas.
+    Runs as a single UPDATE ... SET x = x + n inside the caller's transaction,
+    so concurrent adjustments never overwrite each other.
+    """
+    values = {}
+    if available:
+        values[ParkingLot.available_count] = ParkingLot.available_count + available
+    if occupied:
+        values[ParkingLot.occupied_count] = ParkingLot.occupied_count + occupied
+    if values:
+        ParkingLot.query.filter_by(id=lot_id).update(values, synchronize_session=False)
+
+
+def publish_availability(lot_id):
+    """
+    Call after committing a change to the lot: drops its cached availability
+    and the cached lot listings (which embed the counters), then pushes the
+    new counts to live listeners (one PK read per write, none per listener).
+    """
+    cache.delete('availability', lot_id)
+    cache.invalidate('lots')
+    counts = (
+        db.session.query(ParkingLot.available_count, ParkingLot.occupied_count, ParkingLot.is_active)
+        .filter_by(id=lot_id)
+        .first()
+    )
+    if counts is None:
+        events.publish(f'lot:{lot_id}', {'lot_id': lot_id, 'deleted': True})
+        return
+    events.publish(f'lot:{lot_id}', {
+        'lot_id': lot_id,
+        'available_spots': counts.available_count,
+        'occupied_spots': counts.occupied_count,
+        'is_active': counts.is_active,
+    })
+
+
+def claim_spot(lot_id, candidates=8, max_attempts=5):
+    """
+    Atomically move one available spot in the lot to 'O' and return its id,
+    or None when the lot has no free spot.
+
+    Each attempt is a compare-and-set: UPDATE ... WHERE id = ? AND status = 'A'.
+    Losing a race just means the UPDATE matched no row, so we try the next
+    candidate. Candidates are shuffled so concurrent requests spread over the
+    free spots instead of all fighting for the lowest id.
+    """
+    for _ in range(max_attempts):
+        spot_ids = [
+            row[0] for row in db.session.query(ParkingSpot.id)
+            .filter_by(lot_id=lot_id, status='A', is_active=True)
+            .limit(candidates)
+        ]
+        if not spot_ids:
+            return None
+        random.shuffle(spot_ids)
+        for spot_id in spot_ids:
+            claimed = (
+                ParkingSpot.query
+                .filter_by(id=spot_id, status='A', is_active=True)
+                .update({ParkingSpot.status: 'O'}, synchronize_session=False)
+            )
+            if claimed:
+                adjust_lot_counts(lot_id, available=-1, occupied=1)
+                return spot_id
+    return None
+
+
+def claim_spots(lot_id, count, max_attempts=5):
+    """
+    Batch form of claim_spot: move up to `count` available spots of the lot to
+    'O' and return their ids (fewer when the lot runs out).
+
+    Each attempt claims the still-missing number with one conditional
+    UPDATE ... RETURNING; spots taken concurrently are simply not returned
+    and the next attempt picks new candidates. Counters move once at the end.
+    """
+    claimed = []
+    for _ in range(max_attempts):
+        missing = count - len(claimed)
+        if missing <= 0:
+            break
+        spot_ids = [
+            row[0] for row in db.session.query(ParkingSpot.id)
+            .filter_by(lot_id=lot_id, status='A', is_active=True)
+            .limit(missing)
+        ]
+        if not spot_ids:
+            break
+        claimed += db.session.execute(
+            update(ParkingSpot)
+            .where(ParkingSpot.id.in_(spot_ids), ParkingSpot.status == 'A', ParkingSpot.is_active.is_(True))
+            .values(status='O')
+            .returning(ParkingSpot.id)
+        ).scalars().all()
+    if claimed:
+        adjust_lot_counts(lot_id, available=-len(claimed), occupied=len(claimed))
+    return claimed
+
+
+def add_spots(lot_id, count):
+    """Insert `count` available spots for the lot in one executemany round-trip."""
+    if count > 0:
+        db.session.execute(
+            insert(ParkingSpot),
+            [{'lot_id': lot_id, 'status': 'A', 'is_active': True} for _ in range(count)],
+        )
+
+
+def resize_lot(lot, new_count):
+    """
+    Bring the lot to `new_count` active spots by touching only the difference.
+
+    Growing reactivates previously deactivated spots before inserting new ones;
+    shrinking deactivates free spots (highest ids first) and leaves occupied
+    spots alone, so it works while the lot is in use. Raises ValueError when
+    there are not enough free spots to shrink.
+    """
+    if new_count < 0:
+        raise ValueError('number_of_spots must not be negative')
+    active = ParkingSpot.query.filter_by(lot_id=lot.id, is_active=True).count()
+    delta = new_count - active
+    if delta > 0:
+        inactive_ids = (
+            select(ParkingSpot.id)
+            .where(ParkingSpot.lot_id == lot.id, ParkingSpot.is_active.is_(False), ParkingSpot.status == 'A')
+            .order_by(ParkingSpot.id)
+            .limit(delta)
+        )
+        reactivated = (
+            ParkingSpot.query
+            .filter(ParkingSpot.id.in_(inactive_ids))
+            .update({ParkingSpot.is_active: True}, synchronize_session=False)
+        )
+        add_spots(lot.id, delta - reactivated)
+        adjust_lot_counts(lot.id, available=delta)
+    elif delta < 0:
+        free_ids = (
+            select(ParkingSpot.id)
+            .where(ParkingSpot.lot_id == lot.id, ParkingSpot.is_active.is_(True), ParkingSpot.status == 'A')
+            .order_by(ParkingSpot.id.desc())
+            .limit(-delta)
+        )
+        deactivated = (
+            ParkingSpot.query
+            .filter(ParkingSpot.id.in_(free_ids), ParkingSpot.status == 'A')
+            .update({ParkingSpot.is_active: False}, synchronize_session=False)
+        )
+        if deactivated < -delta:
+            raise ValueError(f'Only {deactivated} free spots can be removed, {-delta} requested')
+        adjust_lot_counts(lot.id, available=delta)
+    lot.number_of_spots = new_count
+
+
+def count_spots(lot_id=None):
+    """Return {lot_id: (available, occupied)} computed from the parking_spot table."""
+    query = db.session.query(
+        ParkingSpot.lot_id,
+        func.sum(case(((ParkingSpot.is_active.is_(True)) & (ParkingSpot.status == 'A'), 1), else_=0)),
+        func.sum(case((ParkingSpot.status == 'O', 1), else_=0)),
+    ).group_by(ParkingSpot.lot_id)
+    if lot_id is not None:
+        query = query.filter(ParkingSpot.lot_id == lot_id)
+    return {row[0]: (int(row[1] or 0), int(row[2] or 0)) for row in query.all()}
+
+
+def reconcile_lot_counts(fix=False):
+    """
+    Compare every lot's counters against the spot table.
+    Returns a list of (lot_id, stored, actual) for the lots that disagree,
+    and rewrites the stored counters when fix=True.
+    """
+    actual = count_spots()
+    mismatches = []
+    for lot_id, available_count, occupied_count in db.session.query(
+        ParkingLot.id, ParkingLot.available_count, ParkingLot.occupied_count
+    ):
+        stored = (available_count, occupied_count)
+        expected = actual.get(lot_id, (0, 0))
+        if stored != expected:
+            mismatches.append((lot_id, stored, expected))
+            if fix:
+                ParkingLot.query.filter_by(id=lot_id).update(
+                    {
+                        ParkingLot.available_count: expected[0],
+                        ParkingLot.occupied_count: expected[1],
+                    },
+                    synchronize_session=False,
+                )
+    if fix:
+        db.session.commit()
+    return mismatches
+
+
+@click.command('reconcile-counters')
+@click.option('--fix', is_flag=True, help='Rewrite counters that disagree with the spot table.')
+@with_appcontext
+def reconcile_counters_command(fix):
+    """Verify per-lot available/occupied counters against parking_spot."""
+    mismatches = reconcile_lot_counts(fix=fix)
+    for lot_id, stored, expected in mismatches:
+        click.echo(f"lot {lot_id}: stored available/occupied={stored}, actual={expected}")
+    if not mismatches:
+        click.echo("All lot counters match the spot table.")
+    elif fix:
+        click.echo(f"Fixed {len(mismatches)} lot(s).")
+    else:
+        raise SystemExit(1)
@@ -0,0 +1,166 @@
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+
+from availability import adjust_lot_counts, claim_spots
+from billing import compute_cost
+from models import db, ParkingLot, ParkingSpot, Reservation
+from rollups import record_releases
+
+BATCH_MAX_ITEMS = 200
+MODES = ('all_or_nothing', 'best_effort')
+
+
+class BatchFailed(Exception):
+    """An all-or-nothing batch could not be completed; `results` says which items failed and why."""
+
+    def __init__(self, results):
+        super().__init__('batch failed')
+        self.results = results
+
+
+def _failed(message, **extra):
+    return {'status': 'failed', 'message': message, **extra}
+
+
+def close_reservations(lot, rows, left_at):
+    """
+    Close open reservations of `lot`, given as (reservation_id, spot_id,
+    parked_at), inside the caller's transaction: one conditional UPDATE
+    claims them, costs are written in one executemany, their spots are freed
+    in one UPDATE and the rollups get one upsert per bucket.
+
+    Reservations already closed by someone else are skipped by the
+    leaving_timestamp IS NULL guard. Returns {reservation_id: cost} for the
+    ones actually closed.
+    """
+    by_id = {res_id: (spot_id, parked_at) for res_id, spot_id, parked_at in rows}
+    closed_ids = db.session.execute(
+        update(Reservation)
+        .where(Reservation.id.in_(list(by_id)), Reservation.leaving_timestamp.is_(None))
+        .values(leaving_timestamp=left_at)
+        .returning(Reservation.id)
+    ).scalars().all()
+    if not closed_ids:
+        return {}
+
+    costs = {res_id: compute_cost(by_id[res_id][1], left_at, lot.price) for res_id in closed_ids}
+    db.session.execute(
+        update(Reservation),
+        [{'id': res_id, 'parking_cost': cost} for res_id, cost in costs.items()],
+    )
+    spot_ids = [by_id[res_id][0] for res_id in closed_ids]
+    freed = Counter(
+        db.session.execute(
+            update(ParkingSpot)
+            .where(ParkingSpot.id.in_(spot_ids))
+            .values(status='A')
+            .returning(ParkingSpot.is_active)
+        ).scalars()
+    )
+    adjust_lot_counts(lot.id, available=freed[True], occupied=-len(spot_ids))
+    record_releases(lot.id, [(by_id[res_id][1], left_at, costs[res_id]) for res_id in closed_ids])
+    return costs
+
+
+def reserve_many(user_id, items, all_or_nothing=True):
+    """
+    Reserve one spot per item ({'lot_id', 'vehicle_number', 'remarks'}) in the
+    caller's transaction: spots are claimed per lot with claim_spots and all
+    reservations are inserted with a single executemany.
+
+    Returns one result dict per item, in order. With all_or_nothing, raises
+    BatchFailed as soon as any item cannot be served; the caller rolls back.
+    """
+    now = datetime.utcnow()
+    results = [None] * len(items)
+    by_lot = defaultdict(list)
+    for i, item in enumerate(items):
+        by_lot[item['lot_id']].append(i)
+    lots = {lot.id: lot for lot in ParkingLot.query.filter(ParkingLot.id.in_(list(by_lot)))}
+
+    rows, row_items = [], []
+    for lot_id, indexes in by_lot.items():
+        lot = lots.get(lot_id)
+        spot_ids = claim_spots(lot_id, len(indexes)) if lot else []
+        for i, spot_id in zip(indexes, spot_ids):
+            rows.append({
+                'user_id': user_id,
+                'spot_id': spot_id,
+                'parking_timestamp': now,
+                'parking_cost': lot.price,
+                'vehicle_number': items[i].get('vehicle_number'),
+                'remarks': items[i].get('remarks'),
+            })
+            row_items.append(i)
+        for i in indexes[len(spot_ids):]:
+            results[i] = _failed('Parking lot not found' if lot is None else 'No spots available',
+                                 lot_id=lot_id, vehicle_number=items[i].get('vehicle_number'))
+
+    if all_or_nothing and len(rows) < len(items):
+        raise BatchFailed([r or {'status': 'skipped'} for r in results])
+
+    if rows:
+        inserted = db.session.execute(
+            insert(Reservation).returning(Reservation.id, Reservation.spot_id, sort_by_parameter_order=True),
+            rows,
+        ).all()
+        for i, (reservation_id, spot_id) in zip(row_items, inserted):
+            results[i] = {
+                'status': 'reserved',
+                'reservation_id': reservation_id,
+                'spot_id': spot_id,
+                'lot_id': items[i]['lot_id'],
+                'vehicle_number': items[i].get('vehicle_number'),
+            }
+    return results
+
+
+def release_many(user_id, reservation_ids, all_or_nothing=True):
+    """
+    Release the user's open reservations in the caller's transaction, one
+    close_reservations call per lot. Returns one result dict per id, in order;
+    with all_or_nothing raises BatchFailed if any of them cannot be released.
+    """
+    left_at = datetime.utcnow()
+    found = {
+        row.id: row for row in db.session.execute(
+            select(Reservation.id, Reservation.user_id, Reservation.spot_id,
+                   Reservation.parking_timestamp, Reservation.leaving_timestamp, ParkingSpot.lot_id)
+            .outerjoin(ParkingSpot, ParkingSpot.id == Reservation.spot_id)
+            .where(Reservation.id.in_(reservation_ids))
+        )
+    }
+
+    results = {}
+    by_lot = defaultdict(list)
+    for res_id in reservation_ids:
+        row = found.get(res_id)
+        if row is None:
+            results[res_id] = _failed('Reservation not found')
+        elif row.user_id != user_id:
+            results[res_id] = _failed('Unauthorized')
+        elif row.leaving_timestamp is not None:
+            results[res_id] = _failed('Already released')
+        elif row.lot_id is None:
+            results[res_id] = _failed('Parking spot no longer exists')
+        else:
+            by_lot[row.lot_id].append((res_id, row.spot_id, row.parking_timestamp))
+    if all_or_nothing and results:
+        raise BatchFailed([
+            {'reservation_id': res_id, **results.get(res_id, {'status': 'skipped'})} for res_id in reservation_ids
+        ])
+
+    lots = {lot.id: lot for lot in ParkingLot.query.filter(ParkingLot.id.in_(list(by_lot)))}
+    for lot_id, rows in by_lot.items():
+        costs = close_reservations(lots[lot_id], rows, left_at)
+        for res_id, _, _ in rows:
+            if res_id in costs:
+                results[res_id] = {'status': 'released', 'lot_id': lot_id, 'parking_cost': costs[res_id]}
+            else:
+                results[res_id] = _failed('Already released')
+    ordered = [{'reservation_id': res_id, **results[res_id]} for res_id in reservation_ids]
+    if all_or_nothing and any(r['status'] == 'failed' for r in ordered):
+        raise BatchFailed(ordered)
+    return ordered
@@ -0,0 +1,225 @@
+"""
+Concurrency benchmark for the SQLite engine profile (db_engine.py).
+
+Runs the same mixed workload against two copies of one seeded database:
+
+  before  a bare create_engine('sqlite:///...') with SQLAlchemy defaults and
+          the rollback journal, as create_app used to configure it
+  after   the engines create_app builds today: WAL, synchronous=NORMAL,
+          busy_timeout, mmap and reads routed to the query_only read pool
+
+Workload, for --seconds:
+  --writers   request-style writers: claim a spot, insert a reservation, commit
+  --readers   request-style readers: lot listing with counters, a user's history
+  1 batch writer standing in for a Celery task: 500-row inserts, one per 50ms
+
+Reports completed operations per second, p50/p99 latency and how many
+operations failed with "database is locked".
+
+    cd backend && python benchmarks/bench_sqlite_concurrency.py --seconds 10
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+LOTS, SPOTS_PER_LOT, USERS, RESERVATIONS = 20, 50, 500, 50_000
+
+CLAIM = text("UPDATE parking_spot SET status = 'O' WHERE id = :spot_id")
+FREE = text("UPDATE parking_spot SET status = 'A' WHERE id = :spot_id")
+RESERVE = text(
+    "INSERT INTO reservation (spot_id, user_id, parking_timestamp, leaving_timestamp, parking_cost) "
+    "VALUES (:spot_id, :user_id, :parked, :left, 10)"
+)
+LOG_MAIL = text(
+    "INSERT INTO email_log (recipient, subject, status, attempts, created_at) "
+    "VALUES (:recipient, 'Reminder', 'sent', 1, :created_at)"
+)
+LIST_LOTS = text("SELECT id, prime_location_name, available_count, occupied_count FROM parking_lot ORDER BY id")
+USER_HISTORY = text(
+    "SELECT id, spot_id, parking_timestamp, parking_cost FROM reservation "
+    "WHERE user_id = :user_id ORDER BY parking_timestamp DESC LIMIT 20"
+)
+
+
+def _app_env(db_path):
+    os.environ.update(
+        DATABASE_URL=f'sqlite:///{db_path}',
+        SECRET_KEY=os.urandom(16).hex(),
+        SESSION_TYPE='cookie',
+        CACHE_TYPE='memory',
+        EVENTS_TYPE='memory',
+        METRICS_ENABLED='0',
+    )
+
+
+def seed(db_path):
+    """Build the schema with init-db and fill it; leaves the file in rollback-journal mode."""
+    _app_env(db_path)
+    from __init__ import create_app
+    from bootstrap import init_db
+    from models import db
+
+    app = create_app()
+    rnd = random.Random(0)
+    start = datetime(2024, 1, 1)
+    with app.app_context():
+        init_db(seed_admin=False)
+        with db.engine.begin() as conn:
+            conn.execute(text("INSERT INTO users (username, email, password_hash, role) VALUES (:u, :e, 'x', 'user')"),
+                         [{'u': f'user{i}', 'e': f'user{i}@example.com'} for i in range(USERS)])
+            conn.execute(text("INSERT INTO parking_lot (prime_location_name, price, number_of_spots, is_active, "
+                              "available_count, occupied_count) VALUES (:name, 10, :n, 1, :n, 0)"),
+                         [{'name': f'Lot {i}', 'n': SPOTS_PER_LOT} for i in range(LOTS)])
+            conn.execute(text("INSERT INTO parking_spot (lot_id, status, is_active) VALUES (:lot_id, 'A', 1)"),
+                         [{'lot_id': lot} for lot in range(1, LOTS + 1) for _ in range(SPOTS_PER_LOT)])
+            rows = []
+            for _ in range(RESERVATIONS):
+                parked = start + timedelta(minutes=rnd.randrange(525_600))
+                rows.append({'spot_id': rnd.randrange(1, LOTS * SPOTS_PER_LOT + 1), 'user_id': rnd.randrange(1, USERS + 1),
+                             'parked': parked, 'left': parked + timedelta(minutes=rnd.randrange(5, 600))})
+            conn.execute(RESERVE, rows)
+        db.engine.dispose()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('PRAGMA journal_mode=DELETE')
+
+
+def before_engines(db_path):
+    engine = create_engine(f'sqlite:///{db_path}')
+    return engine, engine
+
+
+def after_engines(db_path):
+    _app_env(db_path)
+    from __init__ import create_app
+    from db_engine import READ_BIND
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        return db.engine, db.engines.get(READ_BIND, db.engine)
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.locked = {}
+        self.other_errors = {}
+
+    def record(self, kind, fn):
+        t = time.perf_counter()
+        try:
+            fn()
+        except OperationalError as e:
+            bucket = self.locked if 'locked' in str(e) else self.other_errors
+            with self.lock:
+                bucket[kind] = bucket.get(kind, 0) + 1
+            return
+        with self.lock:
+            self.latencies.setdefault(kind, []).append(time.perf_counter() - t)
+
+
+def run(writer_engine, reader_engine, seconds, writers, readers):
+    stats = Stats()
+    deadline = time.perf_counter() + seconds
+    spot_count = LOTS * SPOTS_PER_LOT
+
+    def request_writer(seed_value):
+        rnd = random.Random(seed_value)
+        while time.perf_counter() < deadline:
+            spot_id = rnd.randrange(1, spot_count + 1)
+
+            def reserve():
+                now = datetime.utcnow()
+                with writer_engine.begin() as conn:
+                    conn.execute(CLAIM, {'spot_id': spot_id})
+                    conn.execute(RESERVE, {'spot_id': spot_id, 'user_id': rnd.randrange(1, USERS + 1),
+                                           'parked': now, 'left': now})
+                    conn.execute(FREE, {'spot_id': spot_id})
+            stats.record('write', reserve)
+
+    def batch_writer():
+        while time.perf_counter() < deadline:
+            def log_batch():
+                now = datetime.utcnow()
+                with writer_engine.begin() as conn:
+                    conn.execute(LOG_MAIL, [{'recipient': f'user{i}@example.com', 'created_at': now} for i in range(500)])
+            stats.record('batch', log_batch)
+            time.sleep(0.05)
+
+    def request_reader(seed_value):
+        rnd = random.Random(seed_value)
+        while time.perf_counter() < deadline:
+            def read():
+                with reader_engine.connect() as conn:
+                    conn.execute(LIST_LOTS).all()
+                    conn.execute(USER_HISTORY, {'user_id': rnd.randrange(1, USERS + 1)}).all()
+            stats.record('read', read)
+
+    threads = [threading.Thread(target=request_writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=request_reader, args=(100 + i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=batch_writer))
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return stats, time.perf_counter() - started
+
+
+def _percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+
+def report(label, stats, elapsed):
+    print(f"\n{label}")
+    print(f"  {'kind':<6} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'locked':>8} {'errors':>8}")
+    for kind in ('write', 'batch', 'read'):
+        latencies = stats.latencies.get(kind, [])
+        print(f"  {kind:<6} {len(latencies) / elapsed:>9.1f} {_percentile(latencies, 0.5):>9.2f} "
+              f"{_percentile(latencies, 0.99):>9.2f} {stats.locked.get(kind, 0):>8} {stats.other_errors.get(kind, 0):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=16)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='parking-bench-')
+    try:
+        seeded = os.path.join(work_dir, 'seed.db')
+        print(f"Seeding {RESERVATIONS} reservations in {work_dir} ...")
+        seed(seeded)
+        for label, make_engines in (('before: SQLAlchemy defaults, rollback journal', before_engines),
+                                    ('after: db_engine profile (WAL, busy_timeout, read pool)', after_engines)):
+            db_path = os.path.join(work_dir, f'{make_engines.__name__}.db')
+            shutil.copy(seeded, db_path)
+            writer_engine, reader_engine = make_engines(db_path)
+            stats, elapsed = run(writer_engine, reader_engine, args.seconds, args.writers, args.readers)
+            report(label, stats, elapsed)
+            writer_engine.dispose()
+            reader_engine.dispose()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
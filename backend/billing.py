@@ -0,0 +1,98 @@
+import math
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import select, update
+
+from models import db, ParkingLot, ParkingSpot, Reservation
+from rollups import adjust_revenue
+
+
+def rounding_minutes():
+    """Billing increment in minutes (60 = hourly rounding, 0 = exact pro rata)."""
+    return current_app.config.get('BILLING_ROUNDING_MINUTES', 60)
+
+
+def compute_cost(parked_at, left_at, hourly_price, increment=None):
+    """Cost of a stay: duration rounded up to the billing increment, times the lot's hourly price."""
+    increment = rounding_minutes() if increment is None else increment
+    minutes = max((left_at - parked_at).total_seconds() / 60, 0)
+    if increment:
+        minutes = math.ceil(minutes / increment) * increment
+    return round(minutes / 60 * (hourly_price or 0), 2)
+
+
+def compute_costs(parked_at, left_at, hourly_price, increment):
+    """Vectorized compute_cost over numpy arrays (datetime64 timestamps, float prices)."""
+    minutes = np.maximum((left_at - parked_at) / np.timedelta64(1, 'm'), 0)
+    if increment:
+        minutes = np.ceil(minutes / increment) * increment
+    return np.round(minutes / 60 * np.nan_to_num(hourly_price), 2)
+
+
+def revenue_deltas(lot_ids, left_at, deltas):
+    """
+    Sum per-reservation cost changes into one row per (period, lot, release
+    bucket), the bucket a stay's revenue is booked in by rollups.
+    """
+    changed = deltas != 0
+    lot_ids, left_at, deltas = lot_ids[changed], left_at[changed], deltas[changed]
+    rows = []
+    for period, unit in (('hour', 'h'), ('day', 'D')):
+        buckets = left_at.astype(f'datetime64[{unit}]').astype('datetime64[us]')
+        keys = np.stack([lot_ids, buckets.astype(np.int64)], axis=1)
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        sums = np.bincount(inverse.ravel(), weights=deltas, minlength=len(unique))
+        rows += [
+            {'period': period, 'lot_id': int(lot), 'bucket': np.datetime64(int(bucket), 'us').item(), 'delta': float(total)}
+            for (lot, bucket), total in zip(unique, sums)
+        ]
+    return rows
+
+
+def recompute_costs(increment=None, lot_id=None, chunk_size=50000):
+    """
+    Re-bill every closed reservation (optionally one lot) under the current
+    rules. Works in keyset chunks by id: each chunk is fetched in one query,
+    priced with numpy in one shot and written back with one executemany
+    UPDATE. The change in cost is added to the usage rollups' revenue with one
+    more executemany per chunk. Returns the number of reservations updated.
+    """
+    increment = rounding_minutes() if increment is None else increment
+    last_id = 0
+    updated = 0
+    while True:
+        stmt = (
+            select(
+                Reservation.id, Reservation.parking_timestamp, Reservation.leaving_timestamp,
+                Reservation.parking_cost, ParkingLot.id, ParkingLot.price,
+            )
+            .join(ParkingSpot, ParkingSpot.id == Reservation.spot_id)
+            .join(ParkingLot, ParkingLot.id == ParkingSpot.lot_id)
+            .where(
+                Reservation.id > last_id,
+                Reservation.leaving_timestamp.is_not(None),
+                Reservation.parking_timestamp.is_not(None),
+            )
+            .order_by(Reservation.id)
+            .limit(chunk_size)
+        )
+        if lot_id is not None:
+            stmt = stmt.where(ParkingLot.id == lot_id)
+        rows = db.session.execute(stmt).all()
+        if not rows:
+            break
+        ids, parked, left, old_costs, lot_ids, prices = zip(*rows)
+        left = np.array(left, dtype='datetime64[us]')
+        costs = compute_costs(np.array(parked, dtype='datetime64[us]'), left, np.array(prices, dtype=float), increment)
+        db.session.execute(
+            update(Reservation),
+            [{'id': rid, 'parking_cost': float(cost)} for rid, cost in zip(ids, costs)],
+        )
+        # Rollups book a missing cost as 0 revenue.
+        old_costs = np.nan_to_num(np.array(old_costs, dtype=float))
+        adjust_revenue(revenue_deltas(np.array(lot_ids, dtype=np.int64), left, costs - old_costs))
+        db.session.commit()
+        updated += len(ids)
+        last_id = ids[-1]
+    return updated
@@ -0,0 +1,62 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
+
+from availability import reconcile_lot_counts
+from models import db, User
+
+# Columns added after the first release, for databases created by
+# db.create_all() before they existed (newer deployments use migrations).
+ADDED_COLUMNS = (
+    ('users', 'preferred_reminder_hour', 'INTEGER DEFAULT 18'),
+    ('parking_lot', 'available_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ('parking_lot', 'occupied_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ('parking_lot', 'max_stay_minutes', 'INTEGER'),
+)
+
+
+def init_db(seed_admin=True):
+    """
+    Create missing tables and columns and seed the default admin.
+    Safe to run repeatedly; returns the list of columns it added.
+    """
+    db.create_all()
+
+    added_columns = []
+    with db.engine.connect() as conn:
+        for table, column, ddl in ADDED_COLUMNS:
+            result = conn.execute(text(f"PRAGMA table_info({table});"))
+            columns = [row[1] for row in result]
+            if column not in columns:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl};"))
+                conn.commit()
+                added_columns.append(column)
+
+    if 'available_count' in added_columns:
+        # Backfill the new counters from the existing spot rows.
+        reconcile_lot_counts(fix=True)
+
+    if seed_admin and not User.query.filter_by(role='admin').first():
+        admin = User(
+            username='admin',
+            email='admin@example.com',
+            role='admin',
+            password_hash=generate_password_hash('admin123', method=current_app.config['PASSWORD_HASH_METHOD']),
+            preferred_reminder_hour=18
+        )
+        db.session.add(admin)
+        db.session.commit()
+    return added_columns
+
+
+@click.command('init-db')
+@click.option('--no-admin', is_flag=True, help='Do not create the default admin user.')
+@with_appcontext
+def init_db_command(no_admin):
+    """Create tables, add missing columns and seed the default admin."""
+    added = init_db(seed_admin=not no_admin)
+    if added:
+        click.echo(f"Added columns: {', '.join(added)}")
+    click.echo("Database ready.")
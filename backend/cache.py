@@ -0,0 +1,210 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+
+import redis
+
+
+class MemoryBackend:
+    """Process-local backend with per-key expiry. Used in tests and when Redis is not configured."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            item = self._alive(key)
+            return item[0] if item else None
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    def add(self, key, value, ttl=None):
+        """Set only if the key is absent; returns True when the value was stored."""
+        with self._lock:
+            if self._alive(key):
+                return False
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            item = self._alive(key)
+            value = int(item[0]) + amount if item else amount
+            self._data[key] = (value, None)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    """
+    Redis backend. The client is created on first use so importing the app
+    never opens a connection; Redis errors degrade to cache misses.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.StrictRedis.from_url(self.url, decode_responses=True)
+        return self._client
+
+    def get(self, key):
+        try:
+            return self.client.get(key)
+        except redis.RedisError:
+            return None
+
+    def set(self, key, value, ttl=None):
+        try:
+            self.client.set(key, value, ex=ttl)
+        except redis.RedisError:
+            pass
+
+    def add(self, key, value, ttl=None):
+        try:
+            return bool(self.client.set(key, value, ex=ttl, nx=True))
+        except redis.RedisError:
+            return True
+
+    def delete(self, key):
+        try:
+            self.client.delete(key)
+        except redis.RedisError:
+            pass
+
+    def incr(self, key, amount=1):
+        try:
+            return self.client.incr(key, amount)
+        except redis.RedisError:
+            return None
+
+    def clear(self):
+        try:
+            self.client.flushdb()
+        except redis.RedisError:
+            pass
+
+
+class Cache:
+    """
+    Read-through JSON cache with namespaces.
+
+    Keys live under a per-namespace generation number, so invalidate(namespace)
+    drops every entry of that namespace with one INCR instead of a key scan.
+    On a miss only one caller recomputes the value (guarded by a short lock
+    key); the others wait briefly for it instead of all hitting the database.
+    """
+
+    lock_ttl = 10
+    lock_wait = 2.0
+    lock_poll = 0.05
+
+    def __init__(self, app=None):
+        self.backend = MemoryBackend()
+        self.prefix = 'cache'
+        self.default_ttl = 30
+        self._stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self._stats_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CACHE_TYPE', 'redis')
+        app.config.setdefault('CACHE_REDIS_URL', 'redis://localhost:6379/1')
+        app.config.setdefault('CACHE_DEFAULT_TIMEOUT', 30)
+        app.config.setdefault('CACHE_KEY_PREFIX', 'cache')
+        if app.config['CACHE_TYPE'] == 'redis':
+            self.backend = RedisBackend(app.config['CACHE_REDIS_URL'])
+        else:
+            self.backend = MemoryBackend()
+        self.prefix = app.config['CACHE_KEY_PREFIX']
+        self.default_ttl = app.config['CACHE_DEFAULT_TIMEOUT']
+        app.extensions['cache'] = self
+
+    def _generation(self, namespace):
+        return self.backend.get(f"{self.prefix}:{namespace}:gen") or 0
+
+    def _key(self, namespace, key):
+        return f"{self.prefix}:{namespace}:{self._generation(namespace)}:{key}"
+
+    def _count(self, namespace, field):
+        with self._stats_lock:
+            self._stats[namespace][field] += 1
+
+    def get_or_set(self, namespace, key, compute, ttl=None):
+        ttl = ttl or self.default_ttl
+        full_key = self._key(namespace, key)
+        cached = self.backend.get(full_key)
+        if cached is not None:
+            self._count(namespace, 'hits')
+            return json.loads(cached)
+
+        self._count(namespace, 'misses')
+        lock_key = f"{full_key}:lock"
+        if not self.backend.add(lock_key, '1', ttl=self.lock_ttl):
+            deadline = time.monotonic() + self.lock_wait
+            while time.monotonic() < deadline:
+                time.sleep(self.lock_poll)
+                cached = self.backend.get(full_key)
+                if cached is not None:
+                    return json.loads(cached)
+            # Holder is slow or gone; compute without caching.
+            return compute()
+        try:
+            value = compute()
+            self.backend.set(full_key, json.dumps(value), ttl=ttl)
+            return value
+        finally:
+            self.backend.delete(lock_key)
+
+    def delete(self, namespace, key):
+        self.backend.delete(self._key(namespace, key))
+
+    def invalidate(self, namespace):
+        self.backend.incr(f"{self.prefix}:{namespace}:gen")
+
+    def memoize(self, namespace, ttl=None, key=None):
+        """
+        Cache a function's JSON-serializable return value.
+        `key` maps the call arguments to the cache key; defaults to the
+        positional arguments joined with ':'.
+        """
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                cache_key = key(*args, **kwargs) if key else ':'.join(str(a) for a in args)
+                return self.get_or_set(namespace, cache_key, lambda: f(*args, **kwargs), ttl=ttl)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        with self._stats_lock:
+            return {ns: dict(counts) for ns, counts in self._stats.items()}
+
+
+cache = Cache()
@@ -0,0 +1,102 @@
+from functools import wraps
+
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+READ_BIND = 'read'
+
+
+class RoutingSession(Session):
+    """
+    Session that sends a @read_only view's queries to the 'read' bind.
+    Flushes always go to the default (writer) engine.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context() and g.get('db_read_only'):
+            engine = self._db.engines.get(READ_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(f):
+    """Mark a view as read-only so its queries use the read connection pool."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_read_only = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _is_sqlite_file(url):
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def configure_engines(app):
+    """
+    Fill SQLALCHEMY_ENGINE_OPTIONS and SQLALCHEMY_BINDS before db.init_app().
+
+    The writer pool is SQLALCHEMY_POOL_SIZE connections. Reads from @read_only
+    views go to a separate pool of SQLALCHEMY_READ_POOL_SIZE connections on
+    DATABASE_READ_URL, or on the same SQLite file when unset; with WAL those
+    readers never block the writer. An in-memory SQLite database gets no read
+    bind because each connection would see a different database.
+    """
+    config = app.config
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    options = config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    if uri.startswith('sqlite') and not _is_sqlite_file(uri):
+        return
+    options.setdefault('pool_size', config.get('SQLALCHEMY_POOL_SIZE', 5))
+    options.setdefault('max_overflow', config.get('SQLALCHEMY_MAX_OVERFLOW', 10))
+    options.setdefault('pool_pre_ping', not uri.startswith('sqlite'))
+    if _is_sqlite_file(uri):
+        # Pooled connections move between request threads; busy waiting is
+        # done by the busy_timeout PRAGMA, not the driver's timeout.
+        options.setdefault('connect_args', {}).setdefault('check_same_thread', False)
+
+    read_url = config.get('DATABASE_READ_URL') or (uri if _is_sqlite_file(uri) else None)
+    if read_url:
+        binds = config.setdefault('SQLALCHEMY_BINDS', {})
+        binds.setdefault(READ_BIND, {
+            'url': read_url,
+            'pool_size': config.get('SQLALCHEMY_READ_POOL_SIZE', 10),
+            'max_overflow': config.get('SQLALCHEMY_MAX_OVERFLOW', 10),
+        })
+
+
+def install_sqlite_pragmas(app, db):
+    """
+    Apply the SQLite PRAGMAs to every new connection of each SQLite engine:
+    WAL and synchronous=NORMAL on the writer, busy_timeout and mmap_size on
+    all, query_only on the read pool. Call after db.init_app().
+    """
+    config = app.config
+    busy_timeout = int(config.get('SQLITE_BUSY_TIMEOUT_MS', 15000))
+    mmap_size = int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+
+    def pragmas_for(bind_key):
+        statements = [f"PRAGMA busy_timeout={busy_timeout}", f"PRAGMA mmap_size={mmap_size}"]
+        if bind_key == READ_BIND:
+            statements.append("PRAGMA query_only=ON")
+        else:
+            statements += ["PRAGMA journal_mode=WAL", "PRAGMA synchronous=NORMAL"]
+        return statements
+
+    with app.app_context():
+        engines = dict(db.engines)
+    for bind_key, engine in engines.items():
+        if engine.dialect.name != 'sqlite':
+            continue
+        statements = pragmas_for(bind_key)
+
+        @event.listens_for(engine, 'connect')
+        def set_pragmas(dbapi_connection, connection_record, statements=statements):
+            cursor = dbapi_connection.cursor()
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.close()
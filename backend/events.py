@@ -0,0 +1,104 @@
+import json
+import queue
+import threading
+import time
+from collections import defaultdict
+
+import redis
+
+ALL = '*'
+
+
+class EventBroker:
+    """
+    Fan-out of small JSON events (availability changes) to SSE listeners.
+
+    With EVENTS_TYPE='redis', publish() goes through Redis pub/sub and one
+    listener thread per process relays messages to that process's subscribers,
+    so events from Celery workers and other web processes reach every stream.
+    With EVENTS_TYPE='memory' (or if Redis is unreachable) events are
+    delivered in-process only. Slow subscribers drop events rather than block
+    the publisher.
+    """
+
+    queue_size = 100
+
+    def __init__(self, app=None):
+        self.redis_url = None
+        self.prefix = 'events:'
+        self._client = None
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._listener = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('EVENTS_TYPE', 'redis')
+        app.config.setdefault('EVENTS_REDIS_URL', app.config.get('CACHE_REDIS_URL', 'redis://localhost:6379/1'))
+        self.redis_url = app.config['EVENTS_REDIS_URL'] if app.config['EVENTS_TYPE'] == 'redis' else None
+        app.extensions['events'] = self
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = redis.StrictRedis.from_url(self.redis_url, decode_responses=True)
+        return self._client
+
+    def publish(self, channel, message):
+        if self.redis_url:
+            try:
+                self.client.publish(self.prefix + channel, json.dumps(message))
+                return
+            except redis.RedisError:
+                pass
+        self._dispatch(channel, message)
+
+    def subscribe(self, channel=ALL):
+        """Return a Queue receiving events for `channel` (or every channel for ALL)."""
+        if self.redis_url:
+            self._ensure_listener()
+        q = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[channel].add(q)
+        return q
+
+    def unsubscribe(self, q, channel=ALL):
+        with self._lock:
+            self._subscribers[channel].discard(q)
+            if not self._subscribers[channel]:
+                del self._subscribers[channel]
+
+    def _dispatch(self, channel, message):
+        with self._lock:
+            targets = list(self._subscribers.get(channel, ())) + list(self._subscribers.get(ALL, ()))
+        for q in targets:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                pass
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='event-broker-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.prefix + '*')
+                for item in pubsub.listen():
+                    if item.get('type') != 'pmessage':
+                        continue
+                    channel = item['channel'][len(self.prefix):]
+                    try:
+                        self._dispatch(channel, json.loads(item['data']))
+                    except ValueError:
+                        continue
+            except redis.RedisError:
+                time.sleep(1)
+
+
+events = EventBroker()
@@ -0,0 +1,131 @@
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from flask_mail import Message
+
+from __init__ import mail
+from models import db, EmailLog
+
+
+def build_message(to, subject, body, attachment_path=None, html=False):
+    msg = Message(subject=subject, recipients=[to])
+    if html:
+        msg.html = body
+    else:
+        msg.body = body
+    if attachment_path:
+        content_type = "application/gzip" if attachment_path.endswith(".gz") else "text/csv"
+        with open(attachment_path, "rb") as fh:
+            msg.attach(os.path.basename(attachment_path), content_type, fh.read())
+    return msg
+
+
+class RateLimiter:
+    """Token bucket shared by every delivery in this process; rate is messages per second."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._tokens = rate
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.rate:
+            return
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                time.sleep((1 - self._tokens) / self.rate)
+
+
+_limiter = None
+
+
+def _get_limiter():
+    global _limiter
+    rate = current_app.config.get('MAIL_RATE_LIMIT', 0)
+    if _limiter is None or _limiter.rate != rate:
+        _limiter = RateLimiter(rate)
+    return _limiter
+
+
+def _open_connection():
+    conn = mail.connect()
+    conn.__enter__()
+    return conn
+
+
+def _close_connection(conn):
+    if conn is None:
+        return
+    try:
+        conn.__exit__(None, None, None)
+    except Exception:
+        pass
+
+
+def deliver(messages):
+    """
+    Send a batch of flask_mail Messages over one SMTP connection.
+
+    Every message waits for the process-wide rate limit. A failed send
+    reconnects and is retried up to MAIL_MAX_RETRIES times with exponential
+    backoff (MAIL_RETRY_BACKOFF seconds, doubled each attempt). One EmailLog
+    row per message is bulk-inserted at the end. Returns (sent, failed).
+    """
+    config = current_app.config
+    max_retries = config.get('MAIL_MAX_RETRIES', 3)
+    backoff = config.get('MAIL_RETRY_BACKOFF', 1.0)
+    limiter = _get_limiter()
+
+    log = []
+    sent = failed = 0
+    conn = None
+    try:
+        for msg in messages:
+            attempts = 0
+            error = None
+            while True:
+                attempts += 1
+                limiter.wait()
+                try:
+                    if conn is None:
+                        conn = _open_connection()
+                    conn.send(msg)
+                    error = None
+                    break
+                except (smtplib.SMTPException, OSError) as e:
+                    error = str(e)[:255]
+                    # The session may be dead after an error; the retry starts a fresh one.
+                    _close_connection(conn)
+                    conn = None
+                    if attempts > max_retries or isinstance(e, smtplib.SMTPRecipientsRefused):
+                        break
+                    time.sleep(backoff * 2 ** (attempts - 1))
+            if error:
+                failed += 1
+            else:
+                sent += 1
+            log.append({
+                'recipient': ', '.join(msg.recipients),
+                'subject': (msg.subject or '')[:255],
+                'status': 'failed' if error else 'sent',
+                'attempts': attempts,
+                'error': error,
+                'created_at': datetime.utcnow(),
+            })
+    finally:
+        _close_connection(conn)
+        if log:
+            db.session.execute(db.insert(EmailLog), log)
+            db.session.commit()
+    return sent, failed
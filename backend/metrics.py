@@ -0,0 +1,134 @@
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+_whitespace = re.compile(r'\s+')
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition format, one series per label set."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = defaultdict(lambda: [[0] * len(buckets), 0.0, 0])
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self._lock:
+            counts, _, _ = series = self._series[labels]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(s[0]), s[1], s[2]) for labels, s in self._series.items()]
+        for labels, counts, total, count in sorted(items):
+            label_str = ','.join(f'{k}="{v}"' for k, v in labels)
+            prefix = label_str + ',' if label_str else ''
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label_str}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{label_str}}} {count}')
+        return lines
+
+
+class RequestMetrics:
+    """
+    Per-endpoint request instrumentation.
+
+    Each request records its latency and the number and total time of the SQL
+    statements it ran (counted with SQLAlchemy cursor events), labelled by
+    endpoint, method and status. GET /metrics serves them in the Prometheus
+    text format. In debug mode a request that runs the same statement
+    METRICS_N_PLUS_ONE_THRESHOLD or more times is logged as a likely N+1.
+
+    Metrics are kept per process; scrape every worker, or run one.
+    """
+
+    def __init__(self, app=None):
+        self.latency = Histogram('http_request_duration_seconds', 'Request latency.', LATENCY_BUCKETS)
+        self.queries = Histogram('http_request_db_queries', 'SQL statements per request.', QUERY_COUNT_BUCKETS)
+        self.query_time = Histogram('http_request_db_seconds', 'SQL time per request.', LATENCY_BUCKETS)
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_N_PLUS_ONE_THRESHOLD', 5)
+        app.extensions['metrics'] = self
+        if not app.config['METRICS_ENABLED']:
+            return
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._listening = True
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule('/metrics', 'metrics', self.render)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and 'metrics_started' in g:
+            conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('metrics_query_start')
+        if not starts or not has_request_context() or 'metrics_started' not in g:
+            return
+        g.metrics_query_time += time.perf_counter() - starts.pop()
+        g.metrics_statements[statement] += 1
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_query_time = 0.0
+        g.metrics_statements = Counter()
+
+    def _finish_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None or request.endpoint == 'metrics':
+            return response
+        elapsed = time.perf_counter() - started
+        labels = (
+            ('endpoint', request.endpoint or 'unmatched'),
+            ('method', request.method),
+            ('status', str(response.status_code)),
+        )
+        query_count = sum(g.metrics_statements.values())
+        self.latency.observe(labels, elapsed)
+        self.queries.observe(labels, query_count)
+        self.query_time.observe(labels, g.metrics_query_time)
+
+        if current_app.debug:
+            response.headers['X-Query-Count'] = str(query_count)
+            response.headers['X-Query-Time'] = f"{g.metrics_query_time * 1000:.1f}ms"
+            threshold = current_app.config['METRICS_N_PLUS_ONE_THRESHOLD']
+            for statement, count in g.metrics_statements.most_common():
+                if count < threshold:
+                    break
+                current_app.logger.warning(
+                    "Possible N+1 in %s %s: %d executions of %s",
+                    request.method, request.path, count, _whitespace.sub(' ', statement)[:200],
+                )
+        return response
+
+    def render(self):
+        lines = self.latency.render() + self.queries.render() + self.query_time.render()
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+metrics = RequestMetrics()
@@ -0,0 +1,39 @@
+"""add lot usage rollup
+
+Revision ID: 1b9f6e2a5c84
+Revises: e7b3f08c6d21
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b9f6e2a5c84'
+down_revision = 'e7b3f08c6d21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'lot_usage_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.String(length=4), nullable=False),
+        sa.Column('lot_id', sa.Integer(), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('occupied_minutes', sa.Float(), nullable=False),
+        sa.Column('completed_reservations', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['lot_id'], ['parking_lot.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('period', 'lot_id', 'bucket_start', name='uq_lot_usage_rollup_bucket'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_lot_usage_rollup_period_bucket', 'lot_usage_rollup', ['period', 'bucket_start'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_lot_usage_rollup_period_bucket', table_name='lot_usage_rollup', if_exists=True)
+    op.drop_table('lot_usage_rollup', if_exists=True)
@@ -0,0 +1,40 @@
+"""add hot path indexes
+
+Revision ID: 3f1c2a9d7b10
+Revises: 7ed36b0c30fa
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7b10'
+down_revision = '7ed36b0c30fa'
+branch_labels = None
+depends_on = None
+
+# Databases set up by `flask init-db` (db.create_all()) already have these
+# indexes, hence if_not_exists everywhere.
+
+
+def upgrade():
+    op.create_index('ix_users_role', 'users', ['role'], if_not_exists=True)
+    op.create_index('ix_parking_spot_lot_status', 'parking_spot', ['lot_id', 'status'], if_not_exists=True)
+    op.create_index('ix_reservation_spot_leaving', 'reservation', ['spot_id', 'leaving_timestamp'], if_not_exists=True)
+    op.create_index('ix_reservation_user_parking', 'reservation', ['user_id', 'parking_timestamp'], if_not_exists=True)
+    op.create_index(
+        'ix_reservation_open_spot', 'reservation', ['spot_id'],
+        sqlite_where=sa.text('leaving_timestamp IS NULL'),
+        postgresql_where=sa.text('leaving_timestamp IS NULL'),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_reservation_open_spot', table_name='reservation', if_exists=True)
+    op.drop_index('ix_reservation_user_parking', table_name='reservation', if_exists=True)
+    op.drop_index('ix_reservation_spot_leaving', table_name='reservation', if_exists=True)
+    op.drop_index('ix_parking_spot_lot_status', table_name='parking_spot', if_exists=True)
+    op.drop_index('ix_users_role', table_name='users', if_exists=True)
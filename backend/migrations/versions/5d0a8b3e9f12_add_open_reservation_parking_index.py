@@ -0,0 +1,35 @@
+"""add open reservation parking index
+
+Revision ID: 5d0a8b3e9f12
+Revises: 1b9f6e2a5c84
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d0a8b3e9f12'
+down_revision = '1b9f6e2a5c84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases upgraded by `flask init-db` may already have the column.
+    columns = [c['name'] for c in sa.inspect(op.get_bind()).get_columns('parking_lot')]
+    if 'max_stay_minutes' not in columns:
+        op.add_column('parking_lot', sa.Column('max_stay_minutes', sa.Integer(), nullable=True))
+    op.create_index(
+        'ix_reservation_open_parking', 'reservation', ['parking_timestamp'],
+        sqlite_where=sa.text('leaving_timestamp IS NULL'),
+        postgresql_where=sa.text('leaving_timestamp IS NULL'),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_reservation_open_parking', table_name='reservation', if_exists=True)
+    with op.batch_alter_table('parking_lot') as batch_op:
+        batch_op.drop_column('max_stay_minutes')
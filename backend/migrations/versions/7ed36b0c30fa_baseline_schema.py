@@ -0,0 +1,85 @@
+"""baseline schema
+
+Revision ID: 7ed36b0c30fa
+Revises:
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7ed36b0c30fa'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# The tables as the first release's db.create_all() built them, so that
+# `flask db upgrade` works on an empty database. Databases created by that
+# release (or by `flask init-db`) already have them, hence if_not_exists.
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=80), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password_hash', sa.String(length=128), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=True),
+        sa.Column('preferred_reminder_hour', sa.Integer(), nullable=True, server_default='18'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+        sa.UniqueConstraint('username'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'parking_lot',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('prime_location_name', sa.String(length=120), nullable=False),
+        sa.Column('address', sa.String(length=200), nullable=True),
+        sa.Column('pin_code', sa.String(length=10), nullable=True),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('number_of_spots', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'parking_spot',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('lot_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=1), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(['lot_id'], ['parking_lot.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'reservation',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('spot_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('parking_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('leaving_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('parking_cost', sa.Float(), nullable=True),
+        sa.Column('vehicle_number', sa.String(length=20), nullable=True),
+        sa.Column('remarks', sa.String(length=255), nullable=True),
+        sa.ForeignKeyConstraint(['spot_id'], ['parking_spot.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+
+    # The first release added this column at startup; very old databases lack it.
+    columns = [c['name'] for c in sa.inspect(op.get_bind()).get_columns('users')]
+    if 'preferred_reminder_hour' not in columns:
+        op.add_column('users', sa.Column('preferred_reminder_hour', sa.Integer(), nullable=True, server_default='18'))
+
+
+def downgrade():
+    op.drop_table('reservation', if_exists=True)
+    op.drop_table('parking_spot', if_exists=True)
+    op.drop_table('parking_lot', if_exists=True)
+    op.drop_table('users', if_exists=True)
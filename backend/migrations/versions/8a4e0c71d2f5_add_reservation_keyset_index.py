@@ -0,0 +1,25 @@
+"""add reservation keyset index
+
+Revision ID: 8a4e0c71d2f5
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e0c71d2f5'
+down_revision = '3f1c2a9d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Backs keyset pagination of the admin reservation listing.
+    op.create_index('ix_reservation_parking_id', 'reservation', ['parking_timestamp', 'id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_reservation_parking_id', table_name='reservation', if_exists=True)
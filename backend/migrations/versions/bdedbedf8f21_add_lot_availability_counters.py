@@ -0,0 +1,46 @@
+"""add lot availability counters
+
+Revision ID: bdedbedf8f21
+Revises: 5d0a8b3e9f12
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bdedbedf8f21'
+down_revision = '5d0a8b3e9f12'
+branch_labels = None
+depends_on = None
+
+COUNTERS = ('available_count', 'occupied_count')
+
+
+def upgrade():
+    # Databases upgraded by `flask init-db` may already have the columns.
+    columns = [c['name'] for c in sa.inspect(op.get_bind()).get_columns('parking_lot')]
+    missing = [name for name in COUNTERS if name not in columns]
+    for name in missing:
+        op.add_column('parking_lot', sa.Column(name, sa.Integer(), nullable=False, server_default='0'))
+    if not missing:
+        return
+
+    # Backfill from the spot rows, counting like availability.count_spots().
+    lot = sa.table('parking_lot', sa.column('id'), sa.column('available_count'), sa.column('occupied_count'))
+    spot = sa.table('parking_spot', sa.column('lot_id'), sa.column('status'), sa.column('is_active', sa.Boolean))
+
+    def spot_count(*conditions):
+        return sa.select(sa.func.count()).where(spot.c.lot_id == lot.c.id, *conditions).scalar_subquery()
+
+    op.execute(lot.update().values(
+        available_count=spot_count(spot.c.is_active.is_(True), spot.c.status == 'A'),
+        occupied_count=spot_count(spot.c.status == 'O'),
+    ))
+
+
+def downgrade():
+    with op.batch_alter_table('parking_lot') as batch_op:
+        for name in reversed(COUNTERS):
+            batch_op.drop_column(name)
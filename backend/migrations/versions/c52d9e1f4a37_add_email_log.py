@@ -0,0 +1,37 @@
+"""add email log
+
+Revision ID: c52d9e1f4a37
+Revises: 8a4e0c71d2f5
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52d9e1f4a37'
+down_revision = '8a4e0c71d2f5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'email_log',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipient', sa.String(length=255), nullable=False),
+        sa.Column('subject', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=10), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=True),
+        sa.Column('error', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_email_log_created_at', 'email_log', ['created_at'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_email_log_created_at', table_name='email_log', if_exists=True)
+    op.drop_table('email_log', if_exists=True)
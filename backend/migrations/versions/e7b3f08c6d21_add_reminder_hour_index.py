@@ -0,0 +1,25 @@
+"""add reminder hour index
+
+Revision ID: e7b3f08c6d21
+Revises: c52d9e1f4a37
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3f08c6d21'
+down_revision = 'c52d9e1f4a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The column itself predates migrations (added at startup); only index it here.
+    op.create_index('ix_users_reminder_hour', 'users', ['preferred_reminder_hour'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_users_reminder_hour', table_name='users', if_exists=True)
@@ -1,11 +1,16 @@
 from __init__ import db
+from sqlalchemy import text
 from datetime import datetime
 
 
 
 class User(db.Model):
     __tablename__ = 'users'
-    __table_args__ = {"extend_existing": True}  # <--- This prevents duplicate table errors
+    __table_args__ = (
+        db.Index('ix_users_role', 'role'),
+        db.Index('ix_users_reminder_hour', 'preferred_reminder_hour'),
+        {"extend_existing": True},  # <--- This prevents duplicate table errors
+    )
 
 
     id = db.Column(db.Integer, primary_key=True)
@@ -13,6 +18,7 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
     role = db.Column(db.String(20), default='user')  # 'admin' or 'user'
+    preferred_reminder_hour = db.Column(db.Integer, default=18)  # 0-23, in the Celery timezone
     reservations = db.relationship('Reservation', back_populates='user', lazy=True)
     # In your User model
    
@@ -21,7 +27,8 @@ class User(db.Model):
             'id': self.id,
             'username': self.username,
             'email': self.email,
-            'role': self.role
+            'role': self.role,
+            'preferred_reminder_hour': self.preferred_reminder_hour
         }
 
 class ParkingLot(db.Model):
@@ -36,6 +43,10 @@ class ParkingLot(db.Model):
     price = db.Column(db.Float, nullable=False)
     number_of_spots = db.Column(db.Integer, nullable=False)
     is_active = db.Column(db.Boolean, default=True)
+    max_stay_minutes = db.Column(db.Integer, nullable=True)  # None = app default (DEFAULT_MAX_STAY_MINUTES)
+    # Denormalized from parking_spot; kept in sync by availability.adjust_lot_counts
+    available_count = db.Column(db.Integer, nullable=False, default=0)
+    occupied_count = db.Column(db.Integer, nullable=False, default=0)
     spots = db.relationship('ParkingSpot', back_populates='lot', cascade="all, delete-orphan", lazy=True)
 
     def serialize(self):
@@ -46,12 +57,18 @@ class ParkingLot(db.Model):
             'pin_code': self.pin_code,
             'price': self.price,
             'number_of_spots': self.number_of_spots,
-            'is_active': self.is_active
+            'is_active': self.is_active,
+            'max_stay_minutes': self.max_stay_minutes,
+            'available_spots': self.available_count,
+            'occupied_spots': self.occupied_count
         }
 
 class ParkingSpot(db.Model):
     __tablename__ = 'parking_spot'
-    __table_args__ = {"extend_existing": True}  # <--- This prevents duplicate table errors
+    __table_args__ = (
+        db.Index('ix_parking_spot_lot_status', 'lot_id', 'status'),
+        {"extend_existing": True},  # <--- This prevents duplicate table errors
+    )
 
 
     id = db.Column(db.Integer, primary_key=True)
@@ -71,7 +88,24 @@ class ParkingSpot(db.Model):
 
 class Reservation(db.Model):
     __tablename__ = 'reservation'
-    __table_args__ = {"extend_existing": True}  # <--- This prevents duplicate table errors
+    __table_args__ = (
+        db.Index('ix_reservation_spot_leaving', 'spot_id', 'leaving_timestamp'),
+        db.Index('ix_reservation_user_parking', 'user_id', 'parking_timestamp'),
+        db.Index('ix_reservation_parking_id', 'parking_timestamp', 'id'),
+        # Open reservations by start time, for the expiry sweeper
+        db.Index(
+            'ix_reservation_open_parking', 'parking_timestamp',
+            sqlite_where=text('leaving_timestamp IS NULL'),
+            postgresql_where=text('leaving_timestamp IS NULL'),
+        ),
+        # Partial index: only open reservations, which is what the hot paths look up
+        db.Index(
+            'ix_reservation_open_spot', 'spot_id',
+            sqlite_where=text('leaving_timestamp IS NULL'),
+            postgresql_where=text('leaving_timestamp IS NULL'),
+        ),
+        {"extend_existing": True},  # <--- This prevents duplicate table errors
+    )
 
 
     id = db.Column(db.Integer, primary_key=True)
@@ -97,3 +131,46 @@ class Reservation(db.Model):
             'remarks': self.remarks
         }
 
+
+
+class EmailLog(db.Model):
+    __tablename__ = 'email_log'
+    __table_args__ = {"extend_existing": True}  # <--- This prevents duplicate table errors
+
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255))
+    status = db.Column(db.String(10), nullable=False)  # 'sent' or 'failed'
+    attempts = db.Column(db.Integer, default=1)
+    error = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+
+class LotUsageRollup(db.Model):
+    """Pre-aggregated usage per lot and time bucket; maintained by rollups.py."""
+    __tablename__ = 'lot_usage_rollup'
+    __table_args__ = (
+        db.UniqueConstraint('period', 'lot_id', 'bucket_start', name='uq_lot_usage_rollup_bucket'),
+        db.Index('ix_lot_usage_rollup_period_bucket', 'period', 'bucket_start'),
+        {"extend_existing": True},  # <--- This prevents duplicate table errors
+    )
+
+
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(4), nullable=False)  # 'hour' or 'day'
+    lot_id = db.Column(db.Integer, db.ForeignKey('parking_lot.id', ondelete='CASCADE'), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    occupied_minutes = db.Column(db.Float, nullable=False, default=0)
+    completed_reservations = db.Column(db.Integer, nullable=False, default=0)  # turnover
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+    def serialize(self):
+        return {
+            'lot_id': self.lot_id,
+            'period': self.period,
+            'bucket_start': self.bucket_start.isoformat(),
+            'occupied_minutes': self.occupied_minutes,
+            'completed_reservations': self.completed_reservations,
+            'revenue': self.revenue
+        }
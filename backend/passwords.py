@@ -0,0 +1,108 @@
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from cache import cache
+
+
+@lru_cache(maxsize=None)
+def _hash_prefix(method):
+    """
+    The method string werkzeug stores for `method`, with its defaults filled in
+    ('pbkdf2:sha256' -> 'pbkdf2:sha256:1000000', 'scrypt' -> 'scrypt:32768:8:1').
+    """
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing pool's queue stays full for PASSWORD_HASH_QUEUE_TIMEOUT."""
+
+
+class PasswordHasher:
+    """
+    Runs PBKDF2 in a process pool so request threads only wait on a future.
+
+    At most workers * PASSWORD_HASH_QUEUE_DEPTH hashes are in flight per web
+    process; callers beyond that wait up to PASSWORD_HASH_QUEUE_TIMEOUT and then
+    get HasherBusy, which routes turn into a 503. PASSWORD_HASH_WORKERS=0 hashes
+    inline on the calling thread. The pool is created on first use, and again
+    after a fork, so it is never shared across worker processes.
+    """
+
+    def __init__(self, app=None):
+        self._pool = None
+        self._pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+        app.config.setdefault('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+        app.config.setdefault('PASSWORD_HASH_QUEUE_DEPTH', 4)
+        app.config.setdefault('PASSWORD_HASH_QUEUE_TIMEOUT', 5.0)
+        app.config.setdefault('LOGIN_FAILURE_CACHE_SECONDS', 60)
+        app.extensions['password_hasher'] = self
+
+    def _executor(self):
+        config = current_app.config
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                workers = config['PASSWORD_HASH_WORKERS']
+                self._pool = ProcessPoolExecutor(max_workers=workers)
+                self._slots = threading.BoundedSemaphore(workers * config['PASSWORD_HASH_QUEUE_DEPTH'])
+                self._pid = os.getpid()
+            return self._pool, self._slots
+
+    def _run(self, fn, *args):
+        if not current_app.config['PASSWORD_HASH_WORKERS']:
+            return fn(*args)
+        pool, slots = self._executor()
+        if not slots.acquire(timeout=current_app.config['PASSWORD_HASH_QUEUE_TIMEOUT']):
+            raise HasherBusy()
+        try:
+            return pool.submit(fn, *args).result()
+        finally:
+            slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when the stored hash was made with a different method or cost than configured."""
+        return password_hash.split('$', 1)[0] != _hash_prefix(current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def _failure_key(password_hash, password):
+    # Keyed on the stored hash so a password change invalidates it; HMAC so
+    # the cache never holds anything usable for offline guessing.
+    digest = hmac.new(
+        current_app.config['SECRET_KEY'].encode(),
+        f"{password_hash}\0{password}".encode(),
+        hashlib.sha256,
+    ).hexdigest()
+    return f"auth:failed:{digest}"
+
+
+def recently_failed(password_hash, password):
+    """True if this exact (account, password) pair failed verification within LOGIN_FAILURE_CACHE_SECONDS."""
+    return cache.backend.get(_failure_key(password_hash, password)) is not None
+
+
+def remember_failure(password_hash, password):
+    ttl = current_app.config['LOGIN_FAILURE_CACHE_SECONDS']
+    if ttl:
+        cache.backend.set(_failure_key(password_hash, password), '1', ttl=ttl)
+
+
+hasher = PasswordHasher()
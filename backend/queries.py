@@ -0,0 +1,70 @@
+"""
+Read statements shared by the Flask views (routes.py) and the async entry
+point (asgi.py), so both paths filter, order, count and serialize alike.
+"""
+from sqlalchemy import func, select
+
+from models import ParkingLot, ParkingSpot, Reservation
+
+
+def parse_bool(value):
+    """Query-string flag: None when absent or empty, else True for 1/true/yes."""
+    if value is None or value == '':
+        return None
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def page_bounds(page, per_page, default_per_page=50, max_per_page=500):
+    """Clamp parsed page/per_page; (None, None) when the request is not paginated."""
+    if page is None:
+        return None, None
+    if per_page is None:
+        per_page = default_per_page
+    return max(page, 1), min(max(per_page, 1), max_per_page)
+
+
+def count_rows(stmt):
+    return select(func.count()).select_from(stmt.order_by(None).subquery())
+
+
+def lot_listing(pin_code=None, is_active=None):
+    stmt = select(ParkingLot)
+    if pin_code:
+        stmt = stmt.where(ParkingLot.pin_code == pin_code)
+    if is_active is not None:
+        stmt = stmt.where(ParkingLot.is_active == is_active)
+    return stmt.order_by(ParkingLot.id)
+
+
+def lot_spots(lot_id, status=None):
+    # Open reservations are joined in, so a full lot is still a single query.
+    stmt = (
+        select(ParkingSpot, Reservation.vehicle_number, Reservation.user_id)
+        .outerjoin(
+            Reservation,
+            (Reservation.spot_id == ParkingSpot.id) & Reservation.leaving_timestamp.is_(None),
+        )
+        .where(ParkingSpot.lot_id == lot_id)
+    )
+    if status:
+        stmt = stmt.where(ParkingSpot.status == status)
+    return stmt.order_by(ParkingSpot.id)
+
+
+def serialize_spot(spot, vehicle_number, user_id):
+    d = spot.serialize()
+    if spot.status == 'O' and user_id is not None:
+        d['vehicle_number'] = vehicle_number
+        d['user_id'] = user_id
+    return d
+
+
+def availability_of(lot):
+    # Availability comes from the lot's maintained counters, no spot scan needed.
+    return {
+        'lot_id': lot.id,
+        'is_active': lot.is_active,
+        'number_of_spots': lot.number_of_spots,
+        'available_spots': lot.available_count,
+        'occupied_spots': lot.occupied_count,
+    }
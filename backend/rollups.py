@@ -0,0 +1,155 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, LotUsageRollup, ParkingSpot, Reservation
+
+PERIODS = ('hour', 'day')
+
+
+def bucket_start(ts, period):
+    if period == 'hour':
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _step(period):
+    return timedelta(hours=1) if period == 'hour' else timedelta(days=1)
+
+
+def _contributions(parked_at, left_at, cost, since=None):
+    """
+    Yield ((period, bucket), minutes, completed, revenue) for one closed
+    reservation. Occupied time is split across every bucket the stay spans;
+    turnover and revenue land in the bucket of the release. With `since`, only
+    the parts at or after it are produced.
+    """
+    start = max(parked_at, since) if since else parked_at
+    for period in PERIODS:
+        step = _step(period)
+        bucket = bucket_start(start, period)
+        while bucket < left_at:
+            overlap = min(left_at, bucket + step) - max(start, bucket)
+            minutes = overlap.total_seconds() / 60
+            if minutes > 0:
+                yield (period, bucket), minutes, 0, 0
+            bucket += step
+        if not since or left_at >= since:
+            yield (period, bucket_start(left_at, period)), 0, 1, cost or 0
+
+
+def _upsert_insert():
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(LotUsageRollup)
+    return sqlite.insert(LotUsageRollup)
+
+
+def _apply(lot_id, totals):
+    """Add the accumulated {(period, bucket): [minutes, completed, revenue]} onto the rollup rows."""
+    for (period, bucket), (minutes, completed, revenue) in totals.items():
+        stmt = _upsert_insert().values(
+            period=period,
+            lot_id=lot_id,
+            bucket_start=bucket,
+            occupied_minutes=minutes,
+            completed_reservations=completed,
+            revenue=revenue,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['period', 'lot_id', 'bucket_start'],
+            set_={
+                'occupied_minutes': LotUsageRollup.occupied_minutes + stmt.excluded.occupied_minutes,
+                'completed_reservations': LotUsageRollup.completed_reservations + stmt.excluded.completed_reservations,
+                'revenue': LotUsageRollup.revenue + stmt.excluded.revenue,
+            },
+        )
+        db.session.execute(stmt)
+
+
+def _accumulate(totals, parked_at, left_at, cost, since=None):
+    for key, minutes, completed, revenue in _contributions(parked_at, left_at, cost, since):
+        entry = totals[key]
+        entry[0] += minutes
+        entry[1] += completed
+        entry[2] += revenue
+
+
+def record_release(lot_id, parked_at, left_at, cost):
+    """Fold one released reservation into the rollups, inside the caller's transaction."""
+    record_releases(lot_id, [(parked_at, left_at, cost)])
+
+
+def record_releases(lot_id, stays):
+    """
+    Fold several released reservations of one lot, given as
+    (parked_at, left_at, cost), into the rollups with one upsert per bucket.
+    """
+    totals = defaultdict(lambda: [0.0, 0, 0.0])
+    for parked_at, left_at, cost in stays:
+        if parked_at and left_at:
+            _accumulate(totals, parked_at, left_at, cost)
+    _apply(lot_id, totals)
+
+
+def adjust_revenue(rows):
+    """
+    Add revenue deltas, given as {'period', 'lot_id', 'bucket', 'delta'}, to
+    existing rollup rows with one executemany UPDATE in the caller's transaction.
+    Buckets without a rollup row have nothing to correct and are skipped.
+    """
+    if not rows:
+        return
+    table = LotUsageRollup.__table__
+    stmt = (
+        update(table)
+        .where(
+            table.c.period == bindparam('b_period'),
+            table.c.lot_id == bindparam('b_lot_id'),
+            table.c.bucket_start == bindparam('b_bucket'),
+        )
+        .values(revenue=table.c.revenue + bindparam('b_delta'))
+    )
+    db.session.execute(stmt, [
+        {'b_period': row['period'], 'b_lot_id': row['lot_id'], 'b_bucket': row['bucket'], 'b_delta': row['delta']}
+        for row in rows
+    ])
+
+
+def rebuild_rollups(since):
+    """
+    Recompute every bucket from `since` (aligned down to midnight) onward from
+    the reservation table. Used by the periodic task to correct drift;
+    buckets before `since` are left as they are.
+    """
+    since = bucket_start(since, 'day')
+    LotUsageRollup.query.filter(LotUsageRollup.bucket_start >= since).delete(synchronize_session=False)
+
+    stmt = (
+        select(ParkingSpot.lot_id, Reservation.parking_timestamp, Reservation.leaving_timestamp, Reservation.parking_cost)
+        .join(ParkingSpot, ParkingSpot.id == Reservation.spot_id)
+        .where(Reservation.leaving_timestamp >= since, Reservation.parking_timestamp.is_not(None))
+        .execution_options(yield_per=5000)
+    )
+    per_lot = defaultdict(lambda: defaultdict(lambda: [0.0, 0, 0.0]))
+    rows = 0
+    for lot_id, parked_at, left_at, cost in db.session.execute(stmt):
+        _accumulate(per_lot[lot_id], parked_at, left_at, cost, since=since)
+        rows += 1
+    for lot_id, totals in per_lot.items():
+        _apply(lot_id, totals)
+    db.session.commit()
+    return rows
+
+
+def usage_series(period, start, end, lot_id=None):
+    query = LotUsageRollup.query.filter(
+        LotUsageRollup.period == period,
+        LotUsageRollup.bucket_start >= start,
+        LotUsageRollup.bucket_start < end,
+    )
+    if lot_id is not None:
+        query = query.filter(LotUsageRollup.lot_id == lot_id)
+    return query.order_by(LotUsageRollup.bucket_start, LotUsageRollup.lot_id).all()
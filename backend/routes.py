@@ -1,9 +1,20 @@
-from flask import Blueprint, request, jsonify, session, current_app
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, Response, request, jsonify, session, current_app, stream_with_context
 from models import db, User, ParkingLot, ParkingSpot, Reservation
+from availability import adjust_lot_counts, add_spots, claim_spot, publish_availability, resize_lot
+from cache import cache
+from events import events, ALL
+from rollups import record_release, usage_series
+from billing import compute_cost
+from sweeper import REAPED_METRIC_KEY
+from batch import BATCH_MAX_ITEMS, MODES, BatchFailed, release_many, reserve_many
+from db_engine import read_only
+from passwords import HasherBusy, hasher, recently_failed, remember_failure
+from queries import availability_of, count_rows, lot_listing, lot_spots, page_bounds, parse_bool, serialize_spot
 from functools import wraps
-from datetime import datetime
+from datetime import datetime, timedelta
+import base64
 import json
+import queue
 from flask import send_from_directory
 import os
 api = Blueprint('api', __name__)
@@ -18,6 +29,87 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def parse_bool_arg(name):
+    return parse_bool(request.args.get(name))
+
+def parse_page_args(default_per_page=50, max_per_page=500):
+    """Return (page, per_page) from the query string, or (None, None) when not paginating."""
+    return page_bounds(
+        request.args.get('page', type=int),
+        request.args.get('per_page', type=int),
+        default_per_page=default_per_page,
+        max_per_page=max_per_page,
+    )
+
+def encode_cursor(timestamp, row_id):
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor."""
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except Exception as e:
+        raise ValueError('invalid cursor') from e
+
+def reservation_listing(query):
+    """
+    Newest-first reservation listing shared by the admin and user endpoints.
+
+    - ?format=ndjson streams one JSON object per line, fetched in chunks.
+    - ?limit=N (and ?cursor= from the previous page's X-Next-Cursor header)
+      pages by keyset on (parking_timestamp, id), so deep pages cost the same
+      as the first one.
+    - otherwise returns the whole list, as before.
+    """
+    query = query.order_by(Reservation.parking_timestamp.desc(), Reservation.id.desc())
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            ts, row_id = decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'message': 'Invalid cursor'}), 400
+        query = query.filter(
+            (Reservation.parking_timestamp < ts)
+            | ((Reservation.parking_timestamp == ts) & (Reservation.id < row_id))
+        )
+
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = min(max(limit, 1), 1000)
+
+    if request.args.get('format') == 'ndjson':
+        if limit is not None:
+            query = query.limit(limit)
+
+        def generate():
+            for r in query.yield_per(500):
+                yield json.dumps(r.serialize()) + "\n"
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    if limit is None:
+        return jsonify([r.serialize() for r in query.all()]), 200
+
+    rows = query.limit(limit + 1).all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers['X-Next-Cursor'] = encode_cursor(rows[-1].parking_timestamp, rows[-1].id)
+    return jsonify([r.serialize() for r in rows]), 200, headers
+
+@cache.memoize('availability', ttl=60)
+def lot_availability(lot_id):
+    lot = ParkingLot.query.get(lot_id)
+    return availability_of(lot) if lot else None
+
+@cache.memoize('users', ttl=300)
+def user_profile(user_id):
+    user = User.query.get(user_id)
+    return user.serialize() if user else None
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -48,6 +140,12 @@ def debug_proxy():
     return jsonify(info), 200
 
 # --- Authentication ---
+@api.errorhandler(HasherBusy)
+def hasher_busy(e):
+    response = jsonify({'message': 'Server busy, please retry'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @api.route('/register', methods=['POST'])
 def register():
     data = request.json or {}
@@ -64,41 +162,34 @@ def register():
     if User.query.filter_by(username=username).first():
         return jsonify({'message': 'Username already taken'}), 409
 
-    hashed_password = generate_password_hash(password, method='pbkdf2:sha256')
+    hashed_password = hasher.hash(password)
     new_user = User(email=email, password_hash=hashed_password, username=username, role='user')
     db.session.add(new_user)
     db.session.commit()
     return jsonify({'message': 'Registration successful'}), 201
 
-# Enhanced login route with debug logging (temporary)
 @api.route('/login', methods=['POST'])
 def login():
-    current_app.logger.info("=== LOGIN DEBUG START ===")
-    current_app.logger.info("Remote addr: %s", request.remote_addr)
-    current_app.logger.info("Host header: %s", request.headers.get('Host'))
-    current_app.logger.info("Origin header: %s", request.headers.get('Origin'))
-    current_app.logger.info("Content-Type header: %s", request.headers.get('Content-Type'))
-    current_app.logger.info("All headers: %s", dict(request.headers))
-    try:
-        current_app.logger.info("Raw body: %s", request.get_data(as_text=True))
-    except Exception as e:
-        current_app.logger.info("Error reading body: %s", e)
-
     data = request.json or {}
     email = data.get('email')
     password = data.get('password')
-    current_app.logger.info("Parsed JSON email: %s, password present: %s", email, bool(password))
 
     user = User.query.filter_by(email=email).first()
-    if user and check_password_hash(user.password_hash, password):
+    # Repeating a password that just failed is rejected without re-hashing.
+    valid = bool(user and password) and not recently_failed(user.password_hash, password)
+    if valid and not hasher.verify(user.password_hash, password):
+        remember_failure(user.password_hash, password)
+        valid = False
+    if valid:
+        if hasher.needs_rehash(user.password_hash):
+            user.password_hash = hasher.hash(password)
+            db.session.commit()
         session['user_id'] = user.id
         session['user_role'] = user.role
         current_app.logger.info("Login successful for user id %s", user.id)
-        current_app.logger.info("=== LOGIN DEBUG END ===")
         return jsonify({'message': 'Login successful', 'user_id': user.id, 'role': user.role}), 200
 
     current_app.logger.info("Login failed (invalid credentials)")
-    current_app.logger.info("=== LOGIN DEBUG END ===")
     return jsonify({'message': 'Invalid credentials'}), 401
 
 @api.route('/logout', methods=['POST'])
@@ -109,14 +200,39 @@ def logout():
 @api.route('/me', methods=['GET'])
 @login_required
 def get_current_user():
+    profile = user_profile(session['user_id'])
+    if not profile:
+        return jsonify({'message': 'User not found'}), 404
+    return jsonify(profile), 200
+
+@api.route('/me', methods=['PUT'])
+@login_required
+def update_current_user():
     user = User.query.get(session['user_id'])
     if not user:
         return jsonify({'message': 'User not found'}), 404
+    data = request.json or {}
+    if 'preferred_reminder_hour' in data:
+        hour = data['preferred_reminder_hour']
+        if not isinstance(hour, int) or not 0 <= hour <= 23:
+            return jsonify({'message': 'preferred_reminder_hour must be an integer 0-23'}), 400
+        user.preferred_reminder_hour = hour
+    db.session.commit()
+    cache.delete('users', user.id)
     return jsonify(user.serialize()), 200
 
 # --- Admin: Parking Lot Management ---
+def parse_max_stay(value):
+    """Validate max_stay_minutes: a non-negative integer, or None for no limit."""
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError('max_stay_minutes must be a non-negative integer or null')
+    return value
+
 @api.route('/admin/parkinglots', methods=['GET'])
 @admin_required
+@read_only
 def list_parking_lots():
     lots = ParkingLot.query.all()
     return jsonify([lot.serialize() for lot in lots]), 200
@@ -129,20 +245,26 @@ def create_parking_lot():
     for r in required:
         if r not in data:
             return jsonify({'message': f'{r} is required'}), 400
+    try:
+        max_stay_minutes = parse_max_stay(data.get('max_stay_minutes'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
 
     lot = ParkingLot(
         prime_location_name=data['prime_location_name'],
         address=data.get('address'),
         pin_code=data.get('pin_code'),
         price=data['price'],
-        number_of_spots=data['number_of_spots']
+        number_of_spots=data['number_of_spots'],
+        max_stay_minutes=max_stay_minutes,
+        available_count=data['number_of_spots'],
+        occupied_count=0
     )
     db.session.add(lot)
     db.session.flush()
-    for _ in range(lot.number_of_spots):
-        spot = ParkingSpot(lot_id=lot.id, status='A')
-        db.session.add(spot)
+    add_spots(lot.id, lot.number_of_spots)
     db.session.commit()
+    publish_availability(lot.id)
     return jsonify(lot.serialize()), 201
 
 @api.route('/admin/parkinglots/<int:lot_id>', methods=['PUT'])
@@ -158,18 +280,20 @@ def edit_parking_lot(lot_id):
         lot.pin_code = data['pin_code']
     if 'price' in data:
         lot.price = data['price']
+    if 'max_stay_minutes' in data:
+        try:
+            lot.max_stay_minutes = parse_max_stay(data['max_stay_minutes'])
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'message': str(e)}), 400
     if 'number_of_spots' in data:
-        current_occupied = ParkingSpot.query.filter_by(lot_id=lot.id, status='O').count()
-        if current_occupied > 0:
-            return jsonify({'message': 'Cannot change spot count while spots are occupied'}), 400
-        # Remove existing spots and recreate to match new count
-        ParkingSpot.query.filter_by(lot_id=lot.id).delete()
-        db.session.flush()
-        for _ in range(data['number_of_spots']):
-            spot = ParkingSpot(lot_id=lot.id, status='A')
-            db.session.add(spot)
-        lot.number_of_spots = data['number_of_spots']
+        try:
+            resize_lot(lot, int(data['number_of_spots']))
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'message': str(e)}), 400
     db.session.commit()
+    publish_availability(lot.id)
     return jsonify(lot.serialize()), 200
 
 @api.route('/admin/parkinglots/<int:lot_id>', methods=['DELETE'])
@@ -181,63 +305,132 @@ def delete_parking_lot(lot_id):
         return jsonify({'message': 'Cannot delete, spots are occupied'}), 400
     db.session.delete(lot)
     db.session.commit()
+    publish_availability(lot_id)
     return jsonify({'message': 'Deleted successfully'}), 200
 
 @api.route('/admin/users', methods=['GET'])
 @admin_required
+@read_only
 def list_users():
     users = User.query.filter_by(role='user').all()
     return jsonify([u.serialize() for u in users]), 200
 
 @api.route('/admin/reservations', methods=['GET'])
 @admin_required
+@read_only
 def list_reservations():
-    reservations = Reservation.query.all()
-    return jsonify([r.serialize() for r in reservations]), 200
+    return reservation_listing(Reservation.query)
+
+@api.route('/admin/stats/usage', methods=['GET'])
+@admin_required
+@read_only
+def usage_stats():
+    period = request.args.get('period', 'day')
+    if period not in ('hour', 'day'):
+        return jsonify({'message': 'period must be hour or day'}), 400
+    try:
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else datetime.utcnow()
+        default_span = timedelta(days=1) if period == 'hour' else timedelta(days=30)
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else end - default_span
+    except ValueError:
+        return jsonify({'message': 'start and end must be ISO dates'}), 400
+    rows = usage_series(period, start, end, lot_id=request.args.get('lot_id', type=int))
+    return jsonify([r.serialize() for r in rows]), 200
 
 # --- Admin: Spots status and details by lot ---
 @api.route('/admin/parkinglots/<int:lot_id>/spots', methods=['GET'])
 @admin_required
+@read_only
 def get_spots_in_lot(lot_id):
-    spots = ParkingSpot.query.filter_by(lot_id=lot_id).all()
-    out = []
-    for spot in spots:
-        d = spot.serialize()
-        if spot.status == 'O':
-            res = Reservation.query.filter_by(spot_id=spot.id, leaving_timestamp=None).first()
-            if res:
-                d['vehicle_number'] = res.vehicle_number
-                d['user_id'] = res.user_id
-        out.append(d)
-    return jsonify(out), 200
+    stmt = lot_spots(lot_id, status=request.args.get('status'))
+    headers = {}
+    page, per_page = parse_page_args(default_per_page=100, max_per_page=1000)
+    if page is not None:
+        headers['X-Total-Count'] = str(db.session.scalar(count_rows(stmt)))
+        stmt = stmt.offset((page - 1) * per_page).limit(per_page)
+    return jsonify([serialize_spot(*row) for row in db.session.execute(stmt)]), 200, headers
+
+@api.route('/admin/parkingspots/<int:spot_id>', methods=['PUT'])
+@admin_required
+def set_spot_active(spot_id):
+    spot = ParkingSpot.query.get_or_404(spot_id)
+    data = request.json or {}
+    if 'is_active' not in data:
+        return jsonify({'message': 'is_active is required'}), 400
+    is_active = bool(data['is_active'])
+    if is_active != bool(spot.is_active):
+        spot.is_active = is_active
+        if spot.status == 'A':
+            adjust_lot_counts(spot.lot_id, available=1 if is_active else -1)
+    db.session.commit()
+    publish_availability(spot.lot_id)
+    return jsonify(spot.serialize()), 200
 
 # --- User: Parking Lot View & Reserve ---
 @api.route('/parkinglots', methods=['GET'])
 @login_required
+@read_only
 def user_list_parkinglots():
-    lots = ParkingLot.query.all()
-    output = []
-    for lot in lots:
-        available_spots = ParkingSpot.query.filter_by(lot_id=lot.id, status='A').count()
-        out = lot.serialize()
-        out['available_spots'] = available_spots
-        output.append(out)
-    return jsonify(output), 200
+    stmt = lot_listing(pin_code=request.args.get('pin_code'), is_active=parse_bool_arg('is_active'))
+    headers = {}
+    page, per_page = parse_page_args()
+    if page is not None:
+        headers['X-Total-Count'] = str(db.session.scalar(count_rows(stmt)))
+        stmt = stmt.offset((page - 1) * per_page).limit(per_page)
+    return jsonify([lot.serialize() for lot in db.session.scalars(stmt)]), 200, headers
+
+@api.route('/parkinglots/<int:lot_id>/availability', methods=['GET'])
+@login_required
+@read_only
+def get_lot_availability(lot_id):
+    availability = lot_availability(lot_id)
+    if not availability:
+        return jsonify({'message': 'Parking lot not found'}), 404
+    return jsonify(availability), 200
+
+@api.route('/parkinglots/events', methods=['GET'])
+@api.route('/parkinglots/<int:lot_id>/events', methods=['GET'])
+@login_required
+def availability_events(lot_id=None):
+    """Server-Sent Events stream of availability changes for one lot, or all lots."""
+    channel = f'lot:{lot_id}' if lot_id is not None else ALL
+    initial = lot_availability(lot_id) if lot_id is not None else None
+    if lot_id is not None and initial is None:
+        return jsonify({'message': 'Parking lot not found'}), 404
+
+    def stream():
+        # Subscribed only once the stream starts: a generator that never runs
+        # never reaches the finally below.
+        q = events.subscribe(channel)
+        try:
+            if initial:
+                yield f"event: availability\ndata: {json.dumps(initial)}\n\n"
+            while True:
+                try:
+                    message = q.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: availability\ndata: {json.dumps(message)}\n\n"
+        finally:
+            events.unsubscribe(q, channel)
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @api.route('/parkinglots/<int:lot_id>/reserve', methods=['POST'])
 @login_required
 def reserve_parking_spot(lot_id):
     lot = ParkingLot.query.get_or_404(lot_id)
-    spot = ParkingSpot.query.filter_by(lot_id=lot.id, status='A').first()
-    if not spot:
+    spot_id = claim_spot(lot.id)
+    if spot_id is None:
         return jsonify({'message': 'No spots available'}), 400
-    spot.status = 'O'
     data = request.json or {}
     vehicle_number = data.get('vehicle_number')
     remarks = data.get('remarks')
     new_reservation = Reservation(
         user_id=session['user_id'],
-        spot_id=spot.id,
+        spot_id=spot_id,
         parking_timestamp=datetime.utcnow(),
         parking_cost=lot.price,
         vehicle_number=vehicle_number,
@@ -245,10 +438,11 @@ def reserve_parking_spot(lot_id):
     )
     db.session.add(new_reservation)
     db.session.commit()
+    publish_availability(lot.id)
     return jsonify({
         'message': 'Spot reserved',
         'reservation_id': new_reservation.id,
-        'spot_id': spot.id
+        'spot_id': spot_id
     }), 201
 
 @api.route('/reservations/<int:reservation_id>/release', methods=['POST'])
@@ -259,52 +453,196 @@ def release_spot(reservation_id):
         return jsonify({'message': 'Unauthorized'}), 403
     if reservation.leaving_timestamp:
         return jsonify({'message': 'Already released'}), 400
-    reservation.leaving_timestamp = datetime.utcnow()
     spot = ParkingSpot.query.get(reservation.spot_id)
+    lot = ParkingLot.query.get(spot.lot_id) if spot else None
+    left_at = datetime.utcnow()
+    cost = compute_cost(reservation.parking_timestamp, left_at, lot.price) if lot else reservation.parking_cost
+    # Conditional close so two concurrent releases cannot both free the spot.
+    closed = (
+        Reservation.query
+        .filter_by(id=reservation.id, leaving_timestamp=None)
+        .update({Reservation.leaving_timestamp: left_at, Reservation.parking_cost: cost}, synchronize_session=False)
+    )
+    if not closed:
+        db.session.rollback()
+        return jsonify({'message': 'Already released'}), 400
     if spot:
         spot.status = 'A'
+        adjust_lot_counts(spot.lot_id, available=1 if spot.is_active else 0, occupied=-1)
+        record_release(spot.lot_id, reservation.parking_timestamp, left_at, cost)
     db.session.commit()
-    return jsonify({'message': 'Spot released'}), 200
+    if spot:
+        publish_availability(spot.lot_id)
+    return jsonify({'message': 'Spot released', 'parking_cost': cost}), 200
+
+def parse_batch_mode(data):
+    mode = data.get('mode', 'all_or_nothing')
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+    return mode == 'all_or_nothing'
+
+@api.route('/reservations/batch', methods=['POST'])
+@login_required
+def reserve_batch():
+    """
+    Reserve one spot per vehicle in a single transaction.
+    Body: {"lot_id": default lot, "mode": "all_or_nothing" | "best_effort",
+           "vehicles": ["KA01AB1234", {"vehicle_number": ..., "lot_id": ..., "remarks": ...}, ...]}
+    """
+    data = request.json or {}
+    vehicles = data.get('vehicles')
+    if not isinstance(vehicles, list) or not vehicles:
+        return jsonify({'message': 'vehicles must be a non-empty list'}), 400
+    if len(vehicles) > BATCH_MAX_ITEMS:
+        return jsonify({'message': f'At most {BATCH_MAX_ITEMS} vehicles per batch'}), 400
+    try:
+        all_or_nothing = parse_batch_mode(data)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    try:
+        items = []
+        for vehicle in vehicles:
+            item = vehicle if isinstance(vehicle, dict) else {'vehicle_number': vehicle}
+            items.append({
+                'lot_id': int(item.get('lot_id', data.get('lot_id'))),
+                'vehicle_number': item.get('vehicle_number'),
+                'remarks': item.get('remarks'),
+            })
+    except (TypeError, ValueError):
+        return jsonify({'message': 'Every vehicle needs a lot_id'}), 400
+
+    try:
+        results = reserve_many(session['user_id'], items, all_or_nothing=all_or_nothing)
+    except BatchFailed as e:
+        db.session.rollback()
+        return jsonify({'message': 'Not enough spots; nothing was reserved', 'results': e.results}), 409
+    reserved = sum(1 for r in results if r['status'] == 'reserved')
+    if not reserved:
+        db.session.rollback()
+        return jsonify({'message': 'No spots available', 'results': results}), 409
+    db.session.commit()
+    for lot_id in {item['lot_id'] for item in items}:
+        publish_availability(lot_id)
+    return jsonify({
+        'message': f'Reserved {reserved} of {len(items)} spots',
+        'reserved': reserved,
+        'failed': len(items) - reserved,
+        'results': results,
+    }), 201
+
+@api.route('/reservations/batch/release', methods=['POST'])
+@login_required
+def release_batch():
+    """Release several of the user's reservations in one transaction. Body: {"reservation_ids": [...], "mode": ...}."""
+    data = request.json or {}
+    ids = data.get('reservation_ids')
+    if not isinstance(ids, list) or not ids:
+        return jsonify({'message': 'reservation_ids must be a non-empty list'}), 400
+    if len(ids) > BATCH_MAX_ITEMS:
+        return jsonify({'message': f'At most {BATCH_MAX_ITEMS} reservations per batch'}), 400
+    try:
+        all_or_nothing = parse_batch_mode(data)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    try:
+        ids = list(dict.fromkeys(int(i) for i in ids))
+    except (TypeError, ValueError):
+        return jsonify({'message': 'reservation_ids must be integers'}), 400
+
+    try:
+        results = release_many(session['user_id'], ids, all_or_nothing=all_or_nothing)
+    except BatchFailed as e:
+        db.session.rollback()
+        return jsonify({'message': 'Nothing was released', 'results': e.results}), 409
+    released = [r for r in results if r['status'] == 'released']
+    db.session.commit()
+    for lot_id in {r['lot_id'] for r in released}:
+        publish_availability(lot_id)
+    return jsonify({
+        'message': f'Released {len(released)} of {len(ids)} reservations',
+        'released': len(released),
+        'failed': len(ids) - len(released),
+        'total_cost': round(sum(r['parking_cost'] for r in released), 2),
+        'results': results,
+    }), 200
 
 @api.route('/my/reservations', methods=['GET'])
 @login_required
+@read_only
 def get_user_reservations():
     user_id = session['user_id']
-    reservations = Reservation.query.filter_by(user_id=user_id).order_by(Reservation.parking_timestamp.desc()).all()
-    return jsonify([r.serialize() for r in reservations]), 200
+    return reservation_listing(Reservation.query.filter_by(user_id=user_id))
 
 # --- Async Export Example using Celery batch job ---
 @api.route('/my/export', methods=['POST'])
 @login_required
 def trigger_export():
     user_id = session['user_id']
-    email = request.json.get("email")
+    data = request.json or {}
+    email = data.get("email")
     from tasks import export_user_reservations
-    export_user_reservations.delay(user_id, email)
+    export_user_reservations.delay(user_id, email, compress=bool(data.get("compress")))
     return jsonify({'message': 'Your export job has started. You will receive an alert when done.'}), 202
 
-# --- Simple Caching Example ---
-import redis
-r = redis.StrictRedis(host='localhost', port=6379, db=1, decode_responses=True)
+@api.route('/admin/exports', methods=['POST'])
+@admin_required
+def trigger_admin_export():
+    data = request.json or {}
+    fmt = data.get('format')
+    if fmt not in (None, 'csv', 'parquet'):
+        return jsonify({'message': 'format must be csv or parquet'}), 400
+    start, end = data.get('start'), data.get('end')
+    try:
+        for value in (start, end):
+            if value:
+                datetime.fromisoformat(value)
+    except ValueError:
+        return jsonify({'message': 'start and end must be ISO dates'}), 400
+    from tasks import export_all_reservations, valid_export_id
+    # Passing an existing export_id resumes that export with its original format and range.
+    export_id = data.get('export_id') or f"reservations_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
+    if not valid_export_id(export_id):
+        return jsonify({'message': 'export_id may only contain letters, digits, _ and -'}), 400
+    manifest_path = os.path.join(current_app.config['EXPORTS_DIR'], export_id, 'manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as fh:
+            manifest = json.load(fh)
+        for key, value in (('format', fmt), ('start', start), ('end', end)):
+            if value is not None and value != manifest[key]:
+                return jsonify({'message': f'{key} does not match the export being resumed'}), 400
+    task = export_all_reservations.delay(export_id, fmt, start, end)
+    return jsonify({'message': 'Export started', 'task_id': task.id, 'export_id': export_id}), 202
+
+@api.route('/admin/exports/<task_id>', methods=['GET'])
+@admin_required
+def admin_export_status(task_id):
+    from tasks import celery
+    result = celery.AsyncResult(task_id)
+    info = result.info if isinstance(result.info, dict) else {'detail': str(result.info) if result.info else None}
+    return jsonify({'task_id': task_id, 'state': result.state, **info}), 200
 
+# --- Caching ---
 @api.route('/cached/parkinglots', methods=['GET'])
 @login_required
+@read_only
 def cached_lots():
-    cache_key = "parkinglots"
-    cached = r.get(cache_key)
-    if cached:
-        try:
-            return jsonify(json.loads(cached)), 200
-        except Exception:
-            # fallback, continue to rebuild cache
-            pass
-    lots = ParkingLot.query.all()
-    out = [lot.serialize() for lot in lots]
-    # Store JSON string safely instead of using eval
-    r.setex(cache_key, 30, json.dumps(out))
+    out = cache.get_or_set('lots', 'all', lambda: [lot.serialize() for lot in ParkingLot.query.all()])
     return jsonify(out), 200
 
+@api.route('/admin/sweeper/stats', methods=['GET'])
+@admin_required
+def sweeper_stats():
+    return jsonify({'reaped_total': int(cache.backend.get(REAPED_METRIC_KEY) or 0)}), 200
+
+@api.route('/admin/cache/stats', methods=['GET'])
+@admin_required
+def cache_stats():
+    return jsonify(cache.stats()), 200
+
 @api.route("/download/<filename>")
+@login_required
 def download_file(filename):
-    export_dir = os.path.join(current_app.root_path, "..", "exports")
-    return send_from_directory(export_dir, filename, as_attachment=True)
\ No newline at end of file
+    # User exports are named user_<id>_...; only admins may fetch other users' files.
+    if session.get('user_role') != 'admin' and not filename.startswith(f"user_{session['user_id']}_"):
+        return jsonify({'message': 'File not found'}), 404
+    return send_from_directory(current_app.config['EXPORTS_DIR'], filename, as_attachment=True)
\ No newline at end of file
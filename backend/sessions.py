@@ -0,0 +1,87 @@
+import os
+import struct
+import time
+
+import click
+import redis
+from flask import current_app
+from flask.cli import with_appcontext
+
+
+INSECURE_SECRET_KEYS = (None, '', 'change-me')
+
+
+def init_sessions(app, sess):
+    """
+    Pick the session store from SESSION_TYPE.
+
+    'filesystem' (the default) and the other Flask-Session types keep the
+    session on the server. 'redis' stores sessions under SESSION_KEY_PREFIX
+    with a TTL of PERMANENT_SESSION_LIFETIME. 'cookie' keeps Flask's signed
+    cookie session: nothing is stored server-side, so any worker can serve any
+    request and a request costs one HMAC check. The cookie carries user_role
+    and anyone holding SECRET_KEY can forge one, so 'cookie' refuses to start
+    with the default key. Logout cannot revoke a copied cookie either; it
+    stays valid until it expires.
+    """
+    session_type = app.config.setdefault('SESSION_TYPE', 'filesystem')
+    if session_type == 'cookie':
+        if app.config.get('SECRET_KEY') in INSECURE_SECRET_KEYS:
+            raise RuntimeError('SESSION_TYPE=cookie requires SECRET_KEY to be set to a private value')
+        return
+    if session_type == 'redis':
+        app.config.setdefault('SESSION_REDIS_URL', 'redis://localhost:6379/2')
+        app.config.setdefault('SESSION_KEY_PREFIX', 'session:')
+        # from_url does not connect until the first command.
+        app.config.setdefault('SESSION_REDIS', redis.from_url(app.config['SESSION_REDIS_URL']))
+    sess.init_app(app)
+
+
+def session_file_dir():
+    return current_app.config.get('SESSION_FILE_DIR') or os.path.join(os.getcwd(), 'flask_session')
+
+
+def purge_filesystem_sessions(directory=None, max_age=None, now=None):
+    """
+    Delete expired session files written by the filesystem store.
+
+    Each file starts with its expiry as a 4-byte timestamp; files without one
+    (or unreadable ones) are judged by mtime against `max_age` seconds, which
+    defaults to PERMANENT_SESSION_LIFETIME. Returns the number removed.
+    """
+    directory = directory or session_file_dir()
+    if max_age is None:
+        max_age = current_app.permanent_session_lifetime.total_seconds()
+    now = now or time.time()
+    if not os.path.isdir(directory):
+        return 0
+
+    removed = 0
+    for entry in os.scandir(directory):
+        if not entry.is_file():
+            continue
+        try:
+            with open(entry.path, 'rb') as fh:
+                expires = struct.unpack('I', fh.read(4))[0]
+        except (OSError, struct.error):
+            expires = 0
+        try:
+            if expires:
+                expired = expires < now
+            else:
+                expired = entry.stat().st_mtime < now - max_age
+            if expired:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+@click.command('purge-sessions')
+@click.option('--max-age', type=int, default=None, help='Seconds; defaults to PERMANENT_SESSION_LIFETIME.')
+@with_appcontext
+def purge_sessions_command(max_age):
+    """Delete expired filesystem session files."""
+    removed = purge_filesystem_sessions(max_age=max_age)
+    click.echo(f"Removed {removed} expired session file(s) from {session_file_dir()}.")
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select
+
+from availability import publish_availability
+from batch import close_reservations
+from cache import cache
+from models import db, ParkingLot, ParkingSpot, Reservation
+
+REAPED_METRIC_KEY = 'metrics:reservations_reaped'
+
+
+def _overdue_batch(lot_id, cutoff, batch_size):
+    # Served by the partial index on open reservations' parking_timestamp.
+    return db.session.execute(
+        select(Reservation.id, Reservation.spot_id, Reservation.parking_timestamp)
+        .join(ParkingSpot, ParkingSpot.id == Reservation.spot_id)
+        .where(
+            Reservation.leaving_timestamp.is_(None),
+            Reservation.parking_timestamp < cutoff,
+            ParkingSpot.lot_id == lot_id,
+        )
+        .order_by(Reservation.parking_timestamp)
+        .limit(batch_size)
+    ).all()
+
+
+def _close_batch(lot, rows, now):
+    """
+    Close one batch of overdue reservations of `lot` in a single transaction.
+    Returns how many were actually closed; rows released by their owner in
+    the meantime are skipped by the leaving_timestamp IS NULL guard.
+    """
+    closed = close_reservations(lot, rows, now)
+    if not closed:
+        db.session.rollback()
+        return 0
+    db.session.commit()
+    return len(closed)
+
+
+def sweep_overdue(now=None, batch_size=500):
+    """
+    Release every open reservation that has outlived its lot's max stay
+    (ParkingLot.max_stay_minutes, else DEFAULT_MAX_STAY_MINUTES; 0/None
+    means no limit). Returns {lot_id: reaped} and adds the total to the
+    shared reaped counter.
+    """
+    now = now or datetime.utcnow()
+    default = current_app.config.get('DEFAULT_MAX_STAY_MINUTES', 0)
+    reaped = {}
+    for lot in ParkingLot.query.all():
+        max_stay = lot.max_stay_minutes if lot.max_stay_minutes is not None else default
+        if not max_stay:
+            continue
+        cutoff = now - timedelta(minutes=max_stay)
+        total = 0
+        while True:
+            rows = _overdue_batch(lot.id, cutoff, batch_size)
+            if not rows:
+                break
+            total += _close_batch(lot, rows, now)
+            if len(rows) < batch_size:
+                break
+        if total:
+            reaped[lot.id] = total
+            publish_availability(lot.id)
+    if reaped:
+        cache.backend.incr(REAPED_METRIC_KEY, sum(reaped.values()))
+    return reaped
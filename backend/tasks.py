@@ -1,15 +1,27 @@
 import os
 import csv
-import tempfile
+import shutil
+import time
+import gzip
+import json
+import re
 from datetime import datetime, timedelta, date
-from jinja2 import Template
+from zoneinfo import ZoneInfo
+from functools import lru_cache
+from jinja2 import FileSystemBytecodeCache
 from celery import Celery
 from dotenv import load_dotenv
+from sqlalchemy import func, select
 
 load_dotenv()
 
-from app import create_app
+from __init__ import create_app
 from models import db, User, ParkingLot, ParkingSpot, Reservation
+from mailer import build_message, deliver
+from rollups import rebuild_rollups
+from billing import recompute_costs
+from sweeper import sweep_overdue
+from sessions import purge_filesystem_sessions
 
 
 flask_app = create_app()
@@ -29,17 +41,130 @@ celery.conf.update(
     enable_utc=True,
 )
 
+MONTHLY_REPORT_BATCH_SIZE = 500
+
+
+def _previous_month_range(today=None):
+    """Half-open [first day of last month, first day of this month)."""
+    today = today or datetime.today()
+    this_month = datetime(today.year, today.month, 1)
+    return (this_month - timedelta(days=1)).replace(day=1), this_month
+
+
+def _monthly_report_payloads(start, end, user_ids=None):
+    """
+    Build every user's report summary from one grouped query over
+    (user, lot) instead of walking reservations per user. Yields one dict per
+    user, including users with no reservations in the period.
+    """
+    stmt = (
+        select(
+            Reservation.user_id,
+            ParkingLot.prime_location_name,
+            func.count(Reservation.id),
+            func.coalesce(func.sum(Reservation.parking_cost), 0),
+        )
+        .outerjoin(ParkingSpot, ParkingSpot.id == Reservation.spot_id)
+        .outerjoin(ParkingLot, ParkingLot.id == ParkingSpot.lot_id)
+        .where(Reservation.parking_timestamp >= start, Reservation.parking_timestamp < end)
+        .group_by(Reservation.user_id, ParkingLot.id)
+    )
+    users_stmt = select(User.id, User.email, User.username).order_by(User.id)
+    if user_ids is not None:
+        stmt = stmt.where(Reservation.user_id.in_(user_ids))
+        users_stmt = users_stmt.where(User.id.in_(user_ids))
+
+    stats = {}
+    for user_id, lot_name, count, spent in db.session.execute(stmt):
+        entry = stats.setdefault(user_id, {"total_reservations": 0, "total_spent": 0, "lots": {}})
+        entry["total_reservations"] += count
+        entry["total_spent"] += spent or 0
+        if lot_name:
+            entry["lots"][lot_name] = entry["lots"].get(lot_name, 0) + count
+
+    for user_id, email, username in db.session.execute(users_stmt):
+        entry = stats.get(user_id, {"total_reservations": 0, "total_spent": 0, "lots": {}})
+        lots = entry["lots"]
+        yield {
+            "user_id": user_id,
+            "email": email,
+            "username": username or email,
+            "total_reservations": entry["total_reservations"],
+            "total_spent": entry["total_spent"],
+            "most_used_lot": max(lots, key=lots.get) if lots else "N/A",
+        }
+
+
+def _report_details(user_ids, start, end):
+    """Reservation rows for a batch of users, fetched in one query: {user_id: [row, ...]}."""
+    stmt = (
+        select(
+            Reservation.user_id,
+            Reservation.id,
+            ParkingLot.prime_location_name.label("lot_name"),
+            Reservation.spot_id,
+            Reservation.parking_timestamp,
+            Reservation.leaving_timestamp,
+            Reservation.vehicle_number,
+            Reservation.parking_cost,
+        )
+        .outerjoin(ParkingSpot, ParkingSpot.id == Reservation.spot_id)
+        .outerjoin(ParkingLot, ParkingLot.id == ParkingSpot.lot_id)
+        .where(
+            Reservation.user_id.in_(user_ids),
+            Reservation.parking_timestamp >= start,
+            Reservation.parking_timestamp < end,
+        )
+        .order_by(Reservation.user_id, Reservation.parking_timestamp)
+    )
+    details = {}
+    for row in db.session.execute(stmt).mappings():
+        details.setdefault(row["user_id"], []).append(row)
+    return details
+
+
 @celery.task()
 def send_monthly_activity_report_for_all():
     """
     Send monthly activity report to all users.
+    Summaries for every user come from one aggregation; they are then handed
+    out to workers MONTHLY_REPORT_BATCH_SIZE users per task.
     """
-    
+    start, end = _previous_month_range()
+    batches = 0
+    with flask_app.app_context():
+        batch = []
+        for payload in _monthly_report_payloads(start, end):
+            batch.append(payload)
+            if len(batch) >= MONTHLY_REPORT_BATCH_SIZE:
+                send_monthly_activity_report_batch.delay(batch, start.isoformat(), end.isoformat())
+                batches += 1
+                batch = []
+        if batch:
+            send_monthly_activity_report_batch.delay(batch, start.isoformat(), end.isoformat())
+            batches += 1
+    print(f"[Monthly Report] Scheduled for all users in {batches} batches.")
+
+@celery.task()
+def send_monthly_activity_report_batch(payloads, start, end):
+    """Render and send pre-computed monthly reports for a batch of users."""
+    start, end = datetime.fromisoformat(start), datetime.fromisoformat(end)
     with flask_app.app_context():
-        users = User.query.all()
-        for user in users:
-            send_monthly_activity_report.delay(user.id)
-    print("[Monthly Report] Scheduled for all users.")
+        active_ids = [p["user_id"] for p in payloads if p["total_reservations"]]
+        details = _report_details(active_ids, start, end) if active_ids else {}
+        sent, failed = deliver(
+            _build_monthly_report(payload, details.get(payload["user_id"], []), start)
+            for payload in payloads
+        )
+    print(f"[Monthly Report] Batch of {len(payloads)}: {sent} sent, {failed} failed.")
+
+REMINDER_BATCH_SIZE = 500
+REMINDER_SKIP_RECENT_HOURS = 24
+
+
+def _reminder_message(email):
+    return build_message(email, "Daily Parking Reminder", "This is your daily reminder!")
+
 
 @celery.task()
 def send_daily_reminder(user_id):
@@ -47,20 +172,51 @@ def send_daily_reminder(user_id):
         user = User.query.get(user_id)
         if not user:
             return
-        # logic to send reminder email
-        send_email(user.email, "Daily Parking Reminder", "This is your daily reminder!")
+        deliver([_reminder_message(user.email)])
         print(f"[Daily Reminder] Sent to {user.email}")
 
+@celery.task()
+def send_daily_reminder_batch(user_ids):
+    """Send reminders to a batch of users over one SMTP session."""
+    with flask_app.app_context():
+        emails = db.session.execute(select(User.email).where(User.id.in_(user_ids))).scalars()
+        sent, failed = deliver(_reminder_message(email) for email in emails)
+    print(f"[Daily Reminder] Batch of {len(user_ids)}: {sent} sent, {failed} failed.")
+
 @celery.task()
 def send_daily_reminder_for_all():
-    """Send daily parking reminder to all users."""
+    """Send daily parking reminder to all users, REMINDER_BATCH_SIZE users per task."""
     with flask_app.app_context():
-        from backend.models import User  # lazy import
-        users = User.query.all()
-        for user in users:
-            send_daily_reminder.delay(user.id)
+        user_ids = db.session.execute(select(User.id).order_by(User.id)).scalars().all()
+    for i in range(0, len(user_ids), REMINDER_BATCH_SIZE):
+        send_daily_reminder_batch.delay(user_ids[i:i + REMINDER_BATCH_SIZE])
     print("[Daily Reminder] Scheduled for all users.")
 
+@celery.task()
+def send_hourly_reminders(hour=None):
+    """
+    Remind only the users whose preferred_reminder_hour is the current hour
+    in the Celery timezone, so reminder load is spread across the day.
+    Users who parked within the last REMINDER_SKIP_RECENT_HOURS are skipped.
+    """
+    if hour is None:
+        hour = datetime.now(ZoneInfo(celery.conf.timezone or "UTC")).hour
+    cutoff = datetime.utcnow() - timedelta(hours=REMINDER_SKIP_RECENT_HOURS)
+    parked_recently = (
+        select(Reservation.id)
+        .where(Reservation.user_id == User.id, Reservation.parking_timestamp >= cutoff)
+        .exists()
+    )
+    with flask_app.app_context():
+        user_ids = db.session.execute(
+            select(User.id)
+            .where(User.preferred_reminder_hour == hour, ~parked_recently)
+            .order_by(User.id)
+        ).scalars().all()
+    for i in range(0, len(user_ids), REMINDER_BATCH_SIZE):
+        send_daily_reminder_batch.delay(user_ids[i:i + REMINDER_BATCH_SIZE])
+    print(f"[Daily Reminder] Hour {hour}: scheduled {len(user_ids)} users.")
+
 @celery.task()
 def send_monthly_activity_report(user_id):
     """
@@ -69,105 +225,53 @@ def send_monthly_activity_report(user_id):
     - Most used parking lot
     - Total spent
     """
+    start, end = _previous_month_range()
     with flask_app.app_context():
-        user = User.query.get(user_id)
-        if not user:
+        payload = next(_monthly_report_payloads(start, end, user_ids=[user_id]), None)
+        if not payload:
             print(f"[Monthly Report] User {user_id} not found.")
             return
+        details = _report_details([user_id], start, end) if payload["total_reservations"] else {}
+        deliver([_build_monthly_report(payload, details.get(user_id, []), start)])
+        print(f"[Monthly Report] Sent to {payload['email']}")
 
-        # Calculate first and last day of previous month
-        today = datetime.today()
-        first_day_prev_month = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
-        last_day_prev_month = today.replace(day=1) - timedelta(days=1)
-
-        # Fetch reservations for last month
-        reservations = (
-            Reservation.query
-            .filter(
-                Reservation.user_id == user_id,
-                Reservation.parking_timestamp >= first_day_prev_month,
-                Reservation.parking_timestamp <= last_day_prev_month,
-            )
-            .all()
-        )
 
-        if not reservations:
-            send_email(
-                user.email,
-                f"Monthly Parking Report - {first_day_prev_month.strftime('%B %Y')}",
-                "<p>No reservations found for last month.</p>"
-            )
-            return
+@lru_cache(maxsize=None)
+def _monthly_report_template():
+    """
+    Compiled once per worker process. The bytecode cache lets freshly started
+    workers skip the parse/compile step too.
+    """
+    # Kept under the app's own instance folder: a shared /tmp path could be
+    # pre-created by another local user and fed planted bytecode.
+    cache_dir = os.path.join(flask_app.instance_path, "jinja-cache")
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    flask_app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    return flask_app.jinja_env.get_template("emails/monthly_report.html")
 
-        # Stats
-        total_spent = sum(r.parking_cost or 0 for r in reservations)
-        total_reservations = len(reservations)
-
-        # Most used parking lot
-        lot_counts = {}
-        for r in reservations:
-            if r.spot and r.spot.lot:
-                lot_counts[r.spot.lot.prime_location_name] = lot_counts.get(r.spot.lot.prime_location_name, 0) + 1
-        most_used_lot = max(lot_counts, key=lot_counts.get) if lot_counts else "N/A"
-
-        # Render HTML
-        html_template = Template("""
-        <h2>Monthly Parking Report - {{ month_year }}</h2>
-        <p>Hello {{ username }},</p>
-        <ul>
-            <li>Total Reservations: {{ total_reservations }}</li>
-            <li>Most Used Parking Lot: {{ most_used_lot }}</li>
-            <li>Total Spent: ₹{{ total_spent }}</li>
-        </ul>
-        <h3>Reservation Details:</h3>
-        <table border="1" cellpadding="5" cellspacing="0">
-            <tr>
-                <th>Reservation ID</th>
-                <th>Lot</th>
-                <th>Spot ID</th>
-                <th>Start Time</th>
-                <th>Leaving Time</th>
-                <th>Vehicle Number</th>
-                <th>Parking Cost</th>
-            </tr>
-            {% for r in reservations %}
-            <tr>
-                <td>{{ r.id }}</td>
-                <td>{{ r.spot.lot.prime_location_name if r.spot and r.spot.lot else '' }}</td>
-                <td>{{ r.spot.id if r.spot else '' }}</td>
-                <td>{{ r.parking_timestamp.strftime('%Y-%m-%d %H:%M') if r.parking_timestamp else '' }}</td>
-                <td>{{ r.leaving_timestamp.strftime('%Y-%m-%d %H:%M') if r.leaving_timestamp else '' }}</td>
-                <td>{{ r.vehicle_number or '' }}</td>
-                <td>{{ r.parking_cost or '' }}</td>
-            </tr>
-            {% endfor %}
-        </table>
-        """)
-
-        html_body = html_template.render(
-            month_year=first_day_prev_month.strftime("%B %Y"),
-            username=user.username or user.email,
-            total_reservations=total_reservations,
-            most_used_lot=most_used_lot,
-            total_spent=total_spent,
-            reservations=reservations,
-        )
 
-        send_email(user.email, f"Monthly Parking Report - {first_day_prev_month.strftime('%B %Y')}", html_body)
-        print(f"[Monthly Report] Sent to {user.email}")
+def _build_monthly_report(payload, reservations, month_start):
+    subject = f"Monthly Parking Report - {month_start.strftime('%B %Y')}"
+    if not payload["total_reservations"]:
+        return build_message(payload["email"], subject, "<p>No reservations found for last month.</p>", html=True)
 
+    html_template = _monthly_report_template()
+    html_body = html_template.render(
+        month_year=month_start.strftime("%B %Y"),
+        username=payload["username"],
+        total_reservations=payload["total_reservations"],
+        most_used_lot=payload["most_used_lot"],
+        total_spent=payload["total_spent"],
+        reservations=reservations,
+    )
 
-def send_email(to, subject, body, attachment_path=None, html=False):
-   
-    
-    print("To:", to)
-    print("Subject:", subject)
-    print("HTML:" if html else "Text:", (body or "")[:300])
-    if attachment_path:
-        print("Attachment:", attachment_path)
+    return build_message(payload["email"], subject, html_body, html=True)
 
-    return True
 
+def send_email(to, subject, body, attachment_path=None, html=False):
+    """Send a single message through the pooled delivery pipeline; True when it was sent."""
+    sent, _ = deliver([build_message(to, subject, body, attachment_path=attachment_path, html=html)])
+    return sent == 1
 
 
 def _fmt_dt(dt):
@@ -178,13 +282,78 @@ def _fmt_dt(dt):
     return str(dt)
 
 
+EXPORT_HEADER = [
+    "Reservation ID",
+    "Lot",
+    "Spot ID",
+    "Start Time",
+    "Leaving Time",
+    "Vehicle Number",
+    "Parking Cost",
+    "Remarks",
+]
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_ID_RE = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def valid_export_id(export_id):
+    """Admin export ids name a directory under exports/: plain word characters and dashes only."""
+    return isinstance(export_id, str) and EXPORT_ID_RE.fullmatch(export_id) is not None
+
+
+def _exports_dir():
+    path = flask_app.config["EXPORTS_DIR"]
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _user_export_rows(user_id):
+    """
+    One query for the whole export: lot names are joined in, and rows are
+    fetched in EXPORT_CHUNK_SIZE partitions so memory does not grow with history.
+    """
+    stmt = (
+        select(
+            Reservation.id,
+            ParkingLot.prime_location_name,
+            Reservation.spot_id,
+            Reservation.parking_timestamp,
+            Reservation.leaving_timestamp,
+            Reservation.vehicle_number,
+            Reservation.parking_cost,
+            Reservation.remarks,
+        )
+        .outerjoin(ParkingSpot, ParkingSpot.id == Reservation.spot_id)
+        .outerjoin(ParkingLot, ParkingLot.id == ParkingSpot.lot_id)
+        .where(Reservation.user_id == user_id)
+        .order_by(Reservation.parking_timestamp.desc())
+        .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+    )
+    for partition in db.session.execute(stmt).partitions():
+        yield [
+            [
+                res_id,
+                lot_name or "",
+                spot_id if spot_id is not None else "",
+                _fmt_dt(parked),
+                _fmt_dt(left),
+                vehicle or "",
+                cost if cost is not None else "",
+                remarks or "",
+            ]
+            for res_id, lot_name, spot_id, parked, left, vehicle, cost, remarks in partition
+        ]
+
+
 @celery.task()
-def export_user_reservations(user_id, email):
+def export_user_reservations(user_id, email, compress=False):
     """
     Async task:
-    - Fetch all reservations for given user_id.
-    - Write them to a temp CSV file.
-    - 'Send' an email with CSV attached (mocked).
+    - Stream all reservations for given user_id into exports/ as CSV
+      (gzip-compressed when compress=True), chunk by chunk.
+    - Email the file as an attachment, or a /download link when it is larger
+      than MAIL_MAX_ATTACHMENT_BYTES.
     """
     with flask_app.app_context():
         user = User.query.get(user_id)
@@ -197,14 +366,33 @@ def export_user_reservations(user_id, email):
             )
             return {"status": "error", "message": "user_not_found"}
 
-        reservations = (
-            Reservation.query.filter_by(user_id=user_id)
-            .order_by(Reservation.parking_timestamp.desc())
-            .all()
-        )
+        filename = f"user_{user_id}_reservations_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        if compress:
+            filename += ".gz"
+        path = os.path.join(_exports_dir(), filename)
+
+        count = 0
+        try:
+            opener = gzip.open if compress else open
+            with opener(path, "wt", newline="", encoding="utf-8") as fh:
+                writer = csv.writer(fh)
+                writer.writerow(EXPORT_HEADER)
+                for rows in _user_export_rows(user_id):
+                    writer.writerows(rows)
+                    count += len(rows)
+        except Exception as e:
+            print(f"[export_user_reservations] Error for user {user_id}: {e}")
+            _remove_quietly(path)
+            send_email(
+                email,
+                "Parking Export Failed",
+                f"An error occurred while generating your export: {e}",
+            )
+            return {"status": "error", "message": str(e)}
 
-        if not reservations:
+        if not count:
             print(f"[export_user_reservations] No reservations for user {user_id}.")
+            _remove_quietly(path)
             send_email(
                 email,
                 "Your Parking Export",
@@ -212,90 +400,252 @@ def export_user_reservations(user_id, email):
             )
             return {"status": "no_data", "count": 0}
 
-        tmp_name = None
-        try:
-            # Create temp CSV
-            tmp = tempfile.NamedTemporaryFile(
-                delete=False,
-                suffix=".csv",
-                prefix=f"user_{user_id}_reservations_",
-                mode="w",
-                newline="",
-                encoding="utf-8",
-            )
-            tmp_name = tmp.name
-
-            writer = csv.writer(tmp)
-            writer.writerow(
-                [
-                    "Reservation ID",
-                    "Lot",
-                    "Spot ID",
-                    "Start Time",
-                    "Leaving Time",
-                    "Vehicle Number",
-                    "Parking Cost",
-                    "Remarks",
-                ]
+        subject = f"Your Parking Reservations Export ({count} records)"
+        body = (
+            f"Hello {user.username or user.email},\n\n"
+            f"Your parking reservation history is ready as a CSV file containing {count} records.\n"
+        )
+        if os.path.getsize(path) <= flask_app.config["MAIL_MAX_ATTACHMENT_BYTES"]:
+            attachment_path = path
+            body += "It is attached to this email.\n\n"
+        else:
+            # Too big to attach: link to /download, which keeps it for EXPORT_RETENTION_HOURS.
+            attachment_path = None
+            body += (
+                f"Download it (after logging in) from "
+                f"{flask_app.config['PUBLIC_URL'].rstrip('/')}/download/{filename} "
+                f"within {flask_app.config['EXPORT_RETENTION_HOURS']} hours.\n\n"
             )
+        body += "Thanks,\nVehicle Parking App"
 
-            for r in reservations:
-                lot_name = ""
-                spot_id = ""
-                if r.spot:
-                    spot_id = r.spot.id
-                    if getattr(r.spot, "lot", None):
-                        lot_name = r.spot.lot.prime_location_name
-                writer.writerow(
-                    [
-                        r.id,
-                        lot_name,
-                        spot_id,
-                        _fmt_dt(r.parking_timestamp),
-                        _fmt_dt(r.leaving_timestamp),
-                        r.vehicle_number or "",
-                        r.parking_cost if r.parking_cost is not None else "",
-                        r.remarks or "",
-                    ]
-                )
-
-            tmp.close()
-
-            subject = f"Your Parking Reservations Export ({len(reservations)} records)"
-            body = (
-                f"Hello {user.username or user.email},\n\n"
-                f"Attached is your parking reservation history as a CSV file "
-                f"containing {len(reservations)} records.\n\n"
-                "Thanks,\nVehicle Parking App"
-            )
+        send_email(email, subject, body, attachment_path=attachment_path)
+        print(f"[export_user_reservations] Export complete for user {user_id}, file: {path}")
 
-            send_email(email, subject, body, attachment_path=tmp_name)
-            print(
-                f"[export_user_reservations] Export complete for user {user_id}, file: {tmp_name}"
-            )
+        return {
+            "status": "success",
+            "count": count,
+            "user": user.username,
+            "sent_to": email,
+            "filename": filename,
+        }
 
-            return {
-                "status": "success",
-                "count": len(reservations),
-                "user": user.username,
-                "sent_to": email,
-            }
 
-        except Exception as e:
-            print(f"[export_user_reservations] Error for user {user_id}: {e}")
-            send_email(
-                email,
-                "Parking Export Failed",
-                f"An error occurred while generating your export: {e}",
+@celery.task()
+def purge_old_exports(max_age_hours=None):
+    """
+    Delete export files (and admin export directories) in exports/ older than
+    EXPORT_RETENTION_HOURS, so personal data does not pile up on disk.
+    """
+    if max_age_hours is None:
+        max_age_hours = flask_app.config.get("EXPORT_RETENTION_HOURS", 24)
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for entry in os.scandir(_exports_dir()):
+        try:
+            if entry.stat().st_mtime >= cutoff:
+                continue
+            if entry.is_dir():
+                shutil.rmtree(entry.path)
+            else:
+                os.remove(entry.path)
+            removed += 1
+        except OSError as e:
+            print(f"[Exports] Failed to delete {entry.path}: {e}")
+    print(f"[Exports] Removed {removed} exports older than {max_age_hours}h.")
+    return removed
+
+
+def _remove_quietly(path):
+    if path and os.path.exists(path):
+        try:
+            os.remove(path)
+        except Exception as cleanup_err:
+            print(f"Failed to delete file {path}: {cleanup_err}")
+
+ADMIN_EXPORT_COLUMNS = [
+    "id",
+    "user_id",
+    "lot_id",
+    "lot_name",
+    "spot_id",
+    "parking_timestamp",
+    "leaving_timestamp",
+    "vehicle_number",
+    "parking_cost",
+    "remarks",
+]
+
+ADMIN_EXPORT_CHUNK_SIZE = 50000
+
+
+def _admin_export_chunk(after_id, start, end, limit):
+    """One keyset page of the full reservation history, ordered by id."""
+    stmt = (
+        select(
+            Reservation.id,
+            Reservation.user_id,
+            ParkingLot.id,
+            ParkingLot.prime_location_name,
+            Reservation.spot_id,
+            Reservation.parking_timestamp,
+            Reservation.leaving_timestamp,
+            Reservation.vehicle_number,
+            Reservation.parking_cost,
+            Reservation.remarks,
+        )
+        .outerjoin(ParkingSpot, ParkingSpot.id == Reservation.spot_id)
+        .outerjoin(ParkingLot, ParkingLot.id == ParkingSpot.lot_id)
+        .where(Reservation.id > after_id)
+        .order_by(Reservation.id)
+        .limit(limit)
+    )
+    if start:
+        stmt = stmt.where(Reservation.parking_timestamp >= start)
+    if end:
+        stmt = stmt.where(Reservation.parking_timestamp < end)
+    return db.session.execute(stmt).all()
+
+
+def _write_csv_part(path, rows):
+    with gzip.open(path, "wt", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(ADMIN_EXPORT_COLUMNS)
+        for row in rows:
+            writer.writerow(["" if v is None else _fmt_dt(v) if isinstance(v, datetime) else v for v in row])
+
+
+def _write_parquet_part(path, rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = list(zip(*rows))
+    table = pa.table({name: list(values) for name, values in zip(ADMIN_EXPORT_COLUMNS, columns)})
+    pq.write_table(table, path, compression="zstd")
+
+
+@celery.task(bind=True)
+def export_all_reservations(self, export_id, fmt=None, start=None, end=None):
+    """
+    Admin task: dump the whole reservation history (optionally
+    start <= parking_timestamp < end) into exports/<export_id>/ as numbered
+    part files (gzip CSV, or Parquet when fmt='parquet' and pyarrow is installed).
+
+    Each chunk is a separate keyset query, so the live DB only ever sees short
+    reads. manifest.json records the format, range and last exported id after
+    every part; running the task again with the same export_id resumes from
+    there using the manifest's format and range (arguments that contradict it
+    are rejected). Progress is published as PROGRESS state in the result backend.
+    """
+    if not valid_export_id(export_id):
+        return {"status": "error", "message": "invalid export_id"}
+    out_dir = os.path.join(_exports_dir(), export_id)
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as fh:
+            manifest = json.load(fh)
+        for key, value in (("format", fmt), ("start", start), ("end", end)):
+            if value is not None and value != manifest[key]:
+                return {"status": "error", "message": f"{key} does not match the export being resumed"}
+        if manifest["complete"]:
+            return {"status": "success", "export_id": export_id, **manifest}
+        fmt, start, end = manifest["format"], manifest["start"], manifest["end"]
+    else:
+        fmt = fmt or "csv"
+        manifest = {"format": fmt, "start": start, "end": end, "last_id": 0, "rows": 0, "parts": [], "complete": False}
+
+    if fmt not in ("csv", "parquet"):
+        return {"status": "error", "message": f"unsupported format {fmt}"}
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return {"status": "error", "message": "parquet export requires pyarrow"}
+
+    start_dt = datetime.fromisoformat(start) if start else None
+    end_dt = datetime.fromisoformat(end) if end else None
+    os.makedirs(out_dir, exist_ok=True)
+
+    ext = "parquet" if fmt == "parquet" else "csv.gz"
+    write_part = _write_parquet_part if fmt == "parquet" else _write_csv_part
+
+    with flask_app.app_context():
+        total = db.session.query(func.count(Reservation.id))
+        if start_dt:
+            total = total.filter(Reservation.parking_timestamp >= start_dt)
+        if end_dt:
+            total = total.filter(Reservation.parking_timestamp < end_dt)
+        total = total.scalar()
+
+        while True:
+            rows = _admin_export_chunk(manifest["last_id"], start_dt, end_dt, ADMIN_EXPORT_CHUNK_SIZE)
+            # Release the read transaction between chunks.
+            db.session.rollback()
+            if not rows:
+                break
+            part = f"part-{len(manifest['parts']) + 1:05d}.{ext}"
+            write_part(os.path.join(out_dir, part), rows)
+
+            manifest["parts"].append(part)
+            manifest["last_id"] = rows[-1][0]
+            manifest["rows"] += len(rows)
+            tmp_path = manifest_path + ".tmp"
+            with open(tmp_path, "w") as fh:
+                json.dump(manifest, fh)
+            os.replace(tmp_path, manifest_path)
+
+            self.update_state(
+                state="PROGRESS",
+                meta={"export_id": export_id, "rows": manifest["rows"], "total": total, "parts": len(manifest["parts"])},
             )
-            return {"status": "error", "message": str(e)}
 
-        finally:
-            if tmp_name and os.path.exists(tmp_name):
-                try:
-                    os.remove(tmp_name)
-                except Exception as cleanup_err:
-                    print(f"Failed to delete temp file {tmp_name}: {cleanup_err}")
+    manifest["complete"] = True
+    with open(manifest_path, "w") as fh:
+        json.dump(manifest, fh)
+    print(f"[export_all_reservations] {export_id}: {manifest['rows']} rows in {len(manifest['parts'])} parts")
+    return {"status": "success", "export_id": export_id, **manifest}
+
+
+@celery.task()
+def recompute_reservation_costs(rounding_minutes=None, lot_id=None):
+    """Re-bill closed reservations after a price-rule change (see billing.recompute_costs)."""
+    with flask_app.app_context():
+        updated = recompute_costs(increment=rounding_minutes, lot_id=lot_id)
+    print(f"[Billing] Recomputed cost for {updated} reservations.")
+    return updated
+
+
+@celery.task()
+def release_overdue_reservations():
+    """Periodic sweep that releases reservations past their lot's max stay."""
+    with flask_app.app_context():
+        reaped = sweep_overdue()
+    print(f"[Sweeper] Released {sum(reaped.values())} overdue reservations: {reaped}")
+    return reaped
+
+
+ROLLUP_REBUILD_DAYS = 2
+
+
+@celery.task()
+def rebuild_usage_rollups(days=ROLLUP_REBUILD_DAYS):
+    """
+    Recompute the last `days` days of lot usage rollups from the reservation
+    table. Release-time updates keep them current; this pass fixes drift.
+    """
+    with flask_app.app_context():
+        rows = rebuild_rollups(datetime.utcnow() - timedelta(days=days))
+    print(f"[Rollups] Rebuilt last {days} days from {rows} reservations.")
+    return rows
+
+
+@celery.task()
+def purge_expired_sessions():
+    """Remove expired session files left by SESSION_TYPE=filesystem."""
+    with flask_app.app_context():
+        removed = purge_filesystem_sessions()
+    print(f"[Sessions] Removed {removed} expired session files.")
+    return removed
+
 
 from celery.schedules import crontab
 
@@ -313,8 +663,24 @@ celery.conf.beat_schedule = {
         "task": "backend.tasks.send_monthly_activity_report_for_all",
         "schedule": crontab(minute=0, hour=0, day_of_month=1),  # 1st of every month at 00:00
     },
-    "daily-parking-reminder": {
-        "task": "backend.tasks.send_daily_reminder_for_all",
-        "schedule": crontab(minute=0, hour=8),  # every day at 08:00
+    "usage-rollup-rebuild": {
+        "task": "backend.tasks.rebuild_usage_rollups",
+        "schedule": crontab(minute=15, hour=1),  # nightly at 01:15
+    },
+    "overdue-reservation-sweeper": {
+        "task": "backend.tasks.release_overdue_reservations",
+        "schedule": crontab(minute="*/5"),  # every 5 minutes
+    },
+    "hourly-parking-reminder": {
+        "task": "backend.tasks.send_hourly_reminders",
+        "schedule": crontab(minute=0),  # every hour, users picked by preferred_reminder_hour
+    },
+    "export-retention": {
+        "task": "backend.tasks.purge_old_exports",
+        "schedule": crontab(minute=45),  # hourly
+    },
+    "session-file-cleanup": {
+        "task": "backend.tasks.purge_expired_sessions",
+        "schedule": crontab(minute=30),  # hourly; no-op unless SESSION_TYPE=filesystem
     },
 }
\ No newline at end of file
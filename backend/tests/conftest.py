@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_DIR = tempfile.mkdtemp(prefix='parking-tests-')
+
+os.environ.update(
+    EXPORTS_DIR=os.path.join(DB_DIR, 'exports'),
+    DATABASE_URL=f"sqlite:///{os.path.join(DB_DIR, 'test.db')}",
+    SECRET_KEY='test-secret-key',
+    SESSION_TYPE='cookie',
+    CACHE_TYPE='memory',
+    EVENTS_TYPE='memory',
+    PASSWORD_HASH_WORKERS='0',
+    MAIL_USE_TLS='0',
+    MAIL_RATE_LIMIT='0',
+)
+sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope='session')
+def app():
+    from __init__ import create_app
+    from bootstrap import init_db
+
+    app = create_app()
+    with app.app_context():
+        init_db()
+    return app
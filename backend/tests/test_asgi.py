@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+import httpx
+
+
+def _get_all(app, cookies, requests):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test', cookies=cookies) as client:
+            return [await client.get(path, params=params) for path, params in requests]
+    return asyncio.run(run())
+
+
+def test_native_reads_match_flask(app):
+    import asgi
+
+    flask_client = asgi.flask_app.test_client()
+    flask_client.post('/login', json={'email': 'admin@example.com', 'password': 'admin123'})
+    lot_id = flask_client.post('/admin/parkinglots', json={
+        'prime_location_name': 'Parity', 'price': 10, 'number_of_spots': 3,
+    }).get_json()['id']
+    cookie_name = asgi.flask_app.config['SESSION_COOKIE_NAME']
+    cookies = {cookie_name: flask_client.get_cookie(cookie_name).value}
+
+    requests = [
+        ('/parkinglots', {}),
+        ('/parkinglots', {'page': 1, 'per_page': 2}),
+        ('/parkinglots', {'is_active': 'true'}),
+        (f'/parkinglots/{lot_id}/availability', {}),
+        ('/parkinglots/999999/availability', {}),
+        (f'/admin/parkinglots/{lot_id}/spots', {'page': 1, 'per_page': 2}),
+    ]
+    for (path, params), native in zip(requests, _get_all(asgi.app, cookies, requests)):
+        expected = flask_client.get(path, query_string=params)
+        assert native.status_code == expected.status_code, path
+        assert native.json() == expected.get_json(), path
+        assert native.headers.get('x-total-count') == expected.headers.get('X-Total-Count'), path
+
+
+def test_fallback_runs_requests_concurrently():
+    import asgi
+
+    # Each request waits for the other; on a single shared thread this deadlocks.
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wsgi_app(environ, start_response):
+        barrier.wait()
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'ok']
+
+    fallback = asgi.WsgiFallback(wsgi_app, threads=2, stream_threads=1)
+
+    async def run():
+        transport = httpx.ASGITransport(app=fallback)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            return await asyncio.gather(client.post('/login'), client.post('/reservations/1/release'))
+
+    try:
+        responses = asyncio.run(run())
+    finally:
+        fallback.shutdown()
+    assert [r.text for r in responses] == ['ok', 'ok']
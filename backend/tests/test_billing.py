@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+from billing import recompute_costs
+from models import db, LotUsageRollup, ParkingLot, ParkingSpot, Reservation
+from rollups import record_release
+
+
+def test_recompute_costs_corrects_rollup_revenue(app):
+    parked = datetime(2020, 3, 1, 9, 0)
+    left = parked + timedelta(hours=2)
+    with app.app_context():
+        lot = ParkingLot(prime_location_name='Rebill', price=10, number_of_spots=1, available_count=1)
+        db.session.add(lot)
+        db.session.flush()
+        spot = ParkingSpot(lot_id=lot.id, status='A')
+        db.session.add(spot)
+        db.session.flush()
+        # Billed under an old rule, with the rollup recording that amount.
+        db.session.add(Reservation(user_id=1, spot_id=spot.id, parking_timestamp=parked,
+                                   leaving_timestamp=left, parking_cost=1))
+        record_release(lot.id, parked, left, 1)
+        db.session.commit()
+
+        recompute_costs(increment=60, lot_id=lot.id)
+
+        revenue = dict(db.session.query(LotUsageRollup.period, LotUsageRollup.revenue).filter(
+            LotUsageRollup.lot_id == lot.id, LotUsageRollup.revenue != 0
+        ))
+        assert revenue == {'hour': 20, 'day': 20}
@@ -0,0 +1,13 @@
+def test_cached_listing_follows_reservations(app):
+    client = app.test_client()
+    client.post('/login', json={'email': 'admin@example.com', 'password': 'admin123'})
+    lot_id = client.post('/admin/parkinglots', json={
+        'prime_location_name': 'Cached', 'price': 10, 'number_of_spots': 2,
+    }).get_json()['id']
+
+    def cached_lot():
+        return next(lot for lot in client.get('/cached/parkinglots').get_json() if lot['id'] == lot_id)
+
+    assert cached_lot()['available_spots'] == 2
+    assert client.post(f'/parkinglots/{lot_id}/reserve', json={'vehicle_number': 'KA01'}).status_code == 201
+    assert (cached_lot()['available_spots'], cached_lot()['occupied_spots']) == (1, 1)
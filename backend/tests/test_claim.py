@@ -0,0 +1,51 @@
+import threading
+
+from availability import add_spots, adjust_lot_counts, claim_spot, reconcile_lot_counts
+from models import db, ParkingLot
+
+SPOTS = 40
+THREADS = 16
+CLAIMS_PER_THREAD = 5
+
+
+def test_concurrent_claims_never_share_a_spot(app):
+    with app.app_context():
+        lot = ParkingLot(prime_location_name='Stress', price=10, number_of_spots=SPOTS)
+        db.session.add(lot)
+        db.session.flush()
+        add_spots(lot.id, SPOTS)
+        adjust_lot_counts(lot.id, available=SPOTS)
+        db.session.commit()
+        lot_id = lot.id
+
+    claimed, errors = [], []
+    start = threading.Barrier(THREADS)
+
+    def worker():
+        start.wait()
+        with app.app_context():
+            for _ in range(CLAIMS_PER_THREAD):
+                try:
+                    spot_id = claim_spot(lot_id)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(e)
+                    continue
+                if spot_id is not None:
+                    claimed.append(spot_id)
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    # More attempts than spots: every spot is handed out exactly once.
+    assert len(claimed) == SPOTS
+    assert len(set(claimed)) == SPOTS
+    with app.app_context():
+        assert reconcile_lot_counts() == []
+        lot = db.session.get(ParkingLot, lot_id)
+        assert (lot.available_count, lot.occupied_count) == (0, SPOTS)
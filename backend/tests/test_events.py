@@ -0,0 +1,23 @@
+from events import events
+
+
+def _login(app):
+    client = app.test_client()
+    client.post('/login', json={'email': 'admin@example.com', 'password': 'admin123'})
+    return client
+
+
+def test_events_for_missing_lot_is_404(app):
+    assert _login(app).get('/parkinglots/999999/events').status_code == 404
+
+
+def test_unread_stream_does_not_subscribe(app):
+    client = _login(app)
+    lot_id = client.post('/admin/parkinglots', json={
+        'prime_location_name': 'Events', 'price': 10, 'number_of_spots': 1,
+    }).get_json()['id']
+
+    resp = client.get(f'/parkinglots/{lot_id}/events', buffered=False)
+    assert resp.status_code == 200
+    resp.close()
+    assert not events._subscribers.get(f'lot:{lot_id}')
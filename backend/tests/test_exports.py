@@ -0,0 +1,65 @@
+import os
+import time
+import uuid
+
+
+def _exports_dir(app):
+    path = app.config['EXPORTS_DIR']
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _login_new_user(app):
+    client = app.test_client()
+    name = uuid.uuid4().hex[:8]
+    client.post('/register', json={'username': name, 'email': f'{name}@example.com', 'password': 'pw'})
+    user_id = client.post('/login', json={'email': f'{name}@example.com', 'password': 'pw'}).get_json()['user_id']
+    return client, user_id
+
+
+def test_download_only_serves_own_exports(app):
+    client, user_id = _login_new_user(app)
+    exports = _exports_dir(app)
+    own = f"user_{user_id}_reservations_test.csv"
+    other = f"user_{user_id + 1000}_reservations_test.csv"
+    for name in (own, other):
+        with open(os.path.join(exports, name), "w") as fh:
+            fh.write("id\n")
+    try:
+        assert app.test_client().get(f'/download/{own}').status_code == 401
+        assert client.get(f'/download/{own}').status_code == 200
+        assert client.get(f'/download/{other}').status_code == 404
+    finally:
+        for name in (own, other):
+            os.remove(os.path.join(exports, name))
+
+
+def test_purge_old_exports_keeps_recent_files(app):
+    import tasks
+
+    exports = _exports_dir(app)
+    old, new = (os.path.join(exports, f"user_0_{uuid.uuid4().hex}.csv") for _ in range(2))
+    for path in (old, new):
+        with open(path, "w") as fh:
+            fh.write("id\n")
+    stale = time.time() - 48 * 3600
+    os.utime(old, (stale, stale))
+    try:
+        tasks.purge_old_exports(max_age_hours=24)
+        assert not os.path.exists(old)
+        assert os.path.exists(new)
+    finally:
+        for path in (old, new):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def test_admin_export_rejects_unsafe_ids(app):
+    import tasks
+
+    client = app.test_client()
+    client.post('/login', json={'email': 'admin@example.com', 'password': 'admin123'})
+    for export_id in ('..', '.', 'a/b', 'x y', 123, ['a']):
+        resp = client.post('/admin/exports', json={'export_id': export_id})
+        assert resp.status_code == 400, export_id
+        assert tasks.export_all_reservations(export_id)['status'] == 'error'
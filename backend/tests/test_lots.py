@@ -0,0 +1,25 @@
+import pytest
+
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    client.post('/login', json={'email': 'admin@example.com', 'password': 'admin123'})
+    return client
+
+
+@pytest.mark.parametrize('value', [-5, 'abc', 1.5, True])
+def test_invalid_max_stay_is_rejected(admin_client, value):
+    lot = {'prime_location_name': 'Stay', 'price': 10, 'number_of_spots': 1, 'max_stay_minutes': value}
+    assert admin_client.post('/admin/parkinglots', json=lot).status_code == 400
+
+    lot_id = admin_client.post('/admin/parkinglots', json={**lot, 'max_stay_minutes': 90}).get_json()['id']
+    resp = admin_client.put(f'/admin/parkinglots/{lot_id}', json={'max_stay_minutes': value})
+    assert resp.status_code == 400
+
+
+def test_max_stay_accepts_null(admin_client):
+    lot = {'prime_location_name': 'Stay', 'price': 10, 'number_of_spots': 1, 'max_stay_minutes': None}
+    resp = admin_client.post('/admin/parkinglots', json=lot)
+    assert resp.status_code == 201
+    assert resp.get_json()['max_stay_minutes'] is None
@@ -0,0 +1,95 @@
+import socket
+import uuid
+from datetime import datetime
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from __init__ import mail
+from mailer import build_message, deliver
+from models import db, EmailLog, ParkingLot, ParkingSpot, Reservation, User
+
+REFUSED = 'refused@example.com'
+
+
+class Handler:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address == REFUSED:
+            return '550 mailbox unavailable'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.mail_from, list(envelope.rcpt_tos)))
+        return '250 Message accepted for delivery'
+
+
+@pytest.fixture
+def smtp_server(app):
+    handler = Handler()
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    controller = Controller(handler, hostname='127.0.0.1', port=port)
+    controller.start()
+    state = app.extensions['mail']
+    saved = {k: getattr(state, k) for k in ('server', 'port', 'use_tls', 'use_ssl', 'username', 'suppress')}
+    state.server, state.port = controller.hostname, port
+    state.use_tls = state.use_ssl = state.suppress = False
+    state.username = None
+    try:
+        yield handler
+    finally:
+        for key, value in saved.items():
+            setattr(state, key, value)
+        controller.stop()
+
+
+def test_deliver_sends_batch_and_logs_each_message(app, smtp_server):
+    subject = f'batch-{uuid.uuid4().hex[:8]}'
+    recipients = [f'user{i}@example.com' for i in range(5)] + [REFUSED]
+    with app.app_context():
+        sent, failed = deliver([build_message(to, subject, 'hello') for to in recipients])
+        rows = EmailLog.query.filter_by(subject=subject).all()
+
+    assert (sent, failed) == (5, 1)
+    assert sorted(rcpt for _, rcpts in smtp_server.messages for rcpt in rcpts) == sorted(recipients[:-1])
+    assert len(rows) == 6
+    refused = [row for row in rows if row.recipient == REFUSED]
+    assert [(row.status, row.attempts) for row in refused] == [('failed', 1)]
+    assert all(row.status == 'sent' for row in rows if row.recipient != REFUSED)
+
+
+def test_large_export_is_sent_as_link(app):
+    import tasks
+
+    with tasks.flask_app.app_context():
+        name = uuid.uuid4().hex[:8]
+        user = User(username=name, email=f'{name}@example.com', password_hash='x')
+        lot = ParkingLot(prime_location_name='Export', price=10, number_of_spots=1, available_count=1)
+        db.session.add_all([user, lot])
+        db.session.flush()
+        spot = ParkingSpot(lot_id=lot.id, status='A')
+        db.session.add(spot)
+        db.session.flush()
+        db.session.add(Reservation(user_id=user.id, spot_id=spot.id, parking_timestamp=datetime.utcnow(),
+                                   parking_cost=10, vehicle_number='KA01AB1234'))
+        db.session.commit()
+        user_id = user.id
+
+    config = tasks.flask_app.config
+    saved = config['MAIL_MAX_ATTACHMENT_BYTES']
+    config['MAIL_MAX_ATTACHMENT_BYTES'] = 0
+    try:
+        with mail.record_messages() as outbox:
+            result = tasks.export_user_reservations(user_id, f'{name}@example.com')
+    finally:
+        config['MAIL_MAX_ATTACHMENT_BYTES'] = saved
+
+    assert result['status'] == 'success'
+    assert len(outbox) == 1
+    assert not outbox[0].attachments
+    assert f"/download/{result['filename']}" in outbox[0].body
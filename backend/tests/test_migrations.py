@@ -0,0 +1,91 @@
+import os
+import sqlite3
+
+import flask_migrate
+import pytest
+import sqlalchemy as sa
+
+from conftest import BACKEND_DIR, DB_DIR
+
+MIGRATIONS_DIR = os.path.join(BACKEND_DIR, 'migrations')
+
+# Schema as created by the first release's db.create_all() plus its startup ALTER.
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY, username VARCHAR(80) NOT NULL UNIQUE, email VARCHAR(120) NOT NULL UNIQUE,
+    password_hash VARCHAR(128) NOT NULL, role VARCHAR(20), preferred_reminder_hour INTEGER DEFAULT 18
+);
+CREATE TABLE parking_lot (
+    id INTEGER PRIMARY KEY, prime_location_name VARCHAR(120) NOT NULL, address VARCHAR(200),
+    pin_code VARCHAR(10), price FLOAT NOT NULL, number_of_spots INTEGER NOT NULL, is_active BOOLEAN
+);
+CREATE TABLE parking_spot (
+    id INTEGER PRIMARY KEY, lot_id INTEGER NOT NULL REFERENCES parking_lot (id), status VARCHAR(1), is_active BOOLEAN
+);
+CREATE TABLE reservation (
+    id INTEGER PRIMARY KEY, spot_id INTEGER REFERENCES parking_spot (id), user_id INTEGER REFERENCES users (id),
+    parking_timestamp DATETIME, leaving_timestamp DATETIME, parking_cost FLOAT,
+    vehicle_number VARCHAR(20), remarks VARCHAR(255)
+);
+INSERT INTO parking_lot VALUES (1, 'Old', NULL, NULL, 10, 3, 1);
+INSERT INTO parking_spot VALUES (1, 1, 'A', 1), (2, 1, 'O', 1), (3, 1, 'A', 0);
+"""
+
+
+@pytest.fixture
+def migrated_app(monkeypatch, request):
+    def build(schema=None):
+        path = os.path.join(DB_DIR, f'{request.node.name}.db')
+        if os.path.exists(path):
+            os.remove(path)
+        if schema:
+            with sqlite3.connect(path) as conn:
+                conn.executescript(schema)
+        monkeypatch.setenv('DATABASE_URL', f'sqlite:///{path}')
+        from __init__ import create_app
+
+        app = create_app()
+        with app.app_context():
+            flask_migrate.upgrade(directory=MIGRATIONS_DIR)
+        return app, path
+    return build
+
+
+def test_upgrade_adds_and_backfills_lot_counters(migrated_app):
+    app, path = migrated_app(BASELINE_SCHEMA)
+    with sqlite3.connect(path) as conn:
+        counters = conn.execute('SELECT available_count, occupied_count FROM parking_lot WHERE id = 1').fetchone()
+    assert counters == (1, 1)
+
+    from models import ParkingLot
+    with app.app_context():
+        lot = ParkingLot.query.get(1).serialize()
+    assert (lot['available_spots'], lot['occupied_spots'], lot['max_stay_minutes']) == (1, 1, None)
+
+
+def test_upgrade_from_empty_database_matches_models(migrated_app):
+    from models import db
+
+    app, _ = migrated_app()
+    with app.app_context():
+        inspector = sa.inspect(db.engine)
+        for table in db.metadata.sorted_tables:
+            columns = {c['name'] for c in inspector.get_columns(table.name)}
+            assert columns == set(table.columns.keys()), table.name
+
+
+def test_upgrade_on_top_of_init_db(monkeypatch):
+    from bootstrap import init_db
+    from models import db
+
+    path = os.path.join(DB_DIR, 'init-db-first.db')
+    if os.path.exists(path):
+        os.remove(path)
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{path}')
+    from __init__ import create_app
+
+    app = create_app()
+    with app.app_context():
+        init_db(seed_admin=False)
+        flask_migrate.upgrade(directory=MIGRATIONS_DIR)
+        assert db.session.execute(sa.text('SELECT version_num FROM alembic_version')).scalar()
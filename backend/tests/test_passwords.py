@@ -0,0 +1,16 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from passwords import hasher
+
+
+@pytest.mark.parametrize('method', ['pbkdf2:sha256', 'pbkdf2:sha256:600000', 'scrypt'])
+def test_fresh_hash_does_not_need_rehash(app, method):
+    saved = app.config['PASSWORD_HASH_METHOD']
+    with app.app_context():
+        app.config['PASSWORD_HASH_METHOD'] = method
+        try:
+            assert not hasher.needs_rehash(hasher.hash('secret'))
+            assert hasher.needs_rehash(generate_password_hash('secret', 'pbkdf2:sha256:1000'))
+        finally:
+            app.config['PASSWORD_HASH_METHOD'] = saved
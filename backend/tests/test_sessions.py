@@ -0,0 +1,13 @@
+import pytest
+from flask import Flask
+from flask_session import Session
+
+from sessions import init_sessions
+
+
+@pytest.mark.parametrize('secret', [None, '', 'change-me'])
+def test_cookie_sessions_refuse_default_secret(secret):
+    app = Flask(__name__)
+    app.config.update(SESSION_TYPE='cookie', SECRET_KEY=secret)
+    with pytest.raises(RuntimeError):
+        init_sessions(app, Session())